@@ -11,7 +11,9 @@ akıllı cevaplar veren bir RAG (Retrieval-Augmented Generation) sistemi sağlar
 - 6,425+ ilaç prospektüsü verisi
 """
 import os
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import chromadb
 from fastapi import FastAPI, HTTPException
@@ -24,6 +26,13 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 collection = None
 
+# Chroma sorguları (embedding dahil) CPU'da bloklar; event loop yerine bu
+# executor'da, en fazla SEARCH_CONCURRENCY eşzamanlı arama ile çalışır
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "4"))
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", str(SEARCH_WORKERS)))
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+search_semaphore = None
+
 # --- API Modelleri ---
 class SearchRequest(BaseModel):
     """Arama isteği modeli"""
@@ -56,9 +65,10 @@ app.add_middleware(
 )
 
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
     """Uygulama başlangıcında veritabanı bağlantısını kurar"""
-    global collection
+    global collection, search_semaphore
+    search_semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
     try:
         logger.info("🔌 ChromaDB veritabanına bağlanılıyor...")
         backend_dir = Path(__file__).resolve().parent
@@ -75,6 +85,11 @@ def startup_event():
     except Exception as e:
         logger.error(f"❌ Veritabanı başlatma hatası: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Arama executor'ını kapatır"""
+    search_executor.shutdown(wait=False)
+
 @app.get("/health")
 async def health_check():
     """API sağlık durumunu kontrol eder"""
@@ -92,12 +107,17 @@ async def search(request: SearchRequest):
     
     logger.info(f"Hızlı arama yapılıyor: '{request.query}'")
     try:
-        results = collection.query(query_texts=[request.query], n_results=1)
+        async with search_semaphore:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                search_executor,
+                lambda: collection.query(query_texts=[request.query], n_results=1)
+            )
         if not results['documents'][0]:
             raise HTTPException(status_code=404, detail="Sonuç bulunamadı.")
             
         top_result = results['documents'][0][0]
-        drug_name = results['metadatas'][0][0].get('drug_name', 'Bilinmeyen İlaç')
+        drug_name = results['metadatas'][0][0].get('drug_name') or 'Bilinmeyen İlaç'
         
         answer = f"🔍 **{drug_name}** hakkında bulunan en alakalı bilgi şudur:\n\n*\"{top_result.strip()}\"*\n\n**ÖNEMLİ NOT:** Bu, prospektüsten alınan doğrudan bir alıntıdır ve tıbbi tavsiye yerine geçmez. Lütfen doktorunuza danışın."
         return SearchResponse(llm_answer=answer)
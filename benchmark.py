@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Veritabanı oluşturma adımları için basit performans ölçümleri.
+
+Kullanım:
+    python benchmark.py extract --limit 200 --workers 1 2 4 8
+    python benchmark.py chunk --limit 50
+    python benchmark.py embed --limit 20 --encode-batch-sizes 16 32 64 128
+    python benchmark.py intent --chunks 500
+"""
+
+import time
+import random
+import argparse
+from typing import List
+
+import build_database
+from intent_matcher import QUERY_INTENTS, SENTENCE_KEYWORDS, IntentMatcher
+
+
+def bench_extract(limit: int, workers_list: List[int]):
+    """PDF okuma + parçalama adımını seri ve paralel modda karşılaştırır."""
+    pdf_files = build_database.find_all_pdfs()
+    if limit:
+        pdf_files = pdf_files[:limit]
+    if not pdf_files:
+        print("Olcum icin PDF bulunamadi.")
+        return
+
+    print(f"{len(pdf_files)} PDF uzerinde okuma + parcalama olculuyor")
+    baseline = None
+    for workers in workers_list:
+        start = time.perf_counter()
+        total_chunks = 0
+        failed = 0
+        for result in build_database.iter_processed_pdfs(pdf_files, workers=workers):
+            total_chunks += len(result["chunks"])
+            failed += 1 if result["error"] else 0
+        duration = time.perf_counter() - start
+        if baseline is None:
+            baseline = duration
+        print(
+            f"workers={workers:<3} sure={duration:8.2f}s  "
+            f"pdf/s={len(pdf_files) / duration:7.2f}  chunks={total_chunks}  "
+            f"hatali={failed}  hizlanma={baseline / duration:5.2f}x"
+        )
+
+
+def _legacy_chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
+    """Eski, karakter karakter geriye tarayan parçalayıcı (karşılaştırma için)."""
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        if end < len(text):
+            while end > start and text[end] not in [' ', '\n', '.', '!', '?']:
+                end -= 1
+            if end == start:
+                end = start + chunk_size
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end - overlap
+        if start >= len(text):
+            break
+    return chunks
+
+
+def bench_chunk(limit: int, repeat: int):
+    """chunk_text'i gerçek prospektüs metni üzerinde eski sürümle karşılaştırır."""
+    pdf_files = build_database.find_all_pdfs()[:limit]
+    texts = [build_database.extract_text_from_pdf(pdf["path"]) for pdf in pdf_files]
+    texts = [text for text in texts if text]
+    if not texts:
+        print("Olcum icin metin bulunamadi.")
+        return
+
+    chunk_size, overlap = build_database.CHUNK_SIZE, build_database.CHUNK_OVERLAP
+    mismatches = sum(
+        1 for text in texts
+        if build_database.chunk_text(text, chunk_size, overlap) != _legacy_chunk_text(text, chunk_size, overlap)
+    )
+    total_chars = sum(len(text) for text in texts)
+    print(f"{len(texts)} metin, {total_chars:,} karakter, farkli cikti: {mismatches}")
+
+    for name, fn in (("eski", _legacy_chunk_text), ("yeni", build_database.chunk_text)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for text in texts:
+                fn(text, chunk_size, overlap)
+        duration = (time.perf_counter() - start) / repeat
+        print(f"{name}: {duration * 1000:8.2f} ms/tur  {total_chars / duration / 1e6:7.2f} M karakter/s")
+
+
+def bench_embed(limit: int, encode_batch_sizes: List[int], max_chunks: int):
+    """Farklı encode batch boyutları ve uzunluk sıralamasıyla parça/s ölçer (önbelleksiz)."""
+    pdf_files = build_database.find_all_pdfs()[:limit]
+    chunks = []
+    for pdf in pdf_files:
+        text = build_database.extract_text_from_pdf(pdf["path"])
+        if text:
+            chunks.extend(build_database.chunk_text(text))
+    chunks = chunks[:max_chunks]
+    if not chunks:
+        print("Olcum icin parca bulunamadi.")
+        return
+
+    print(f"{len(chunks)} parca kodlaniyor ({build_database.EMBEDDING_MODEL})")
+    embedder = build_database.BatchedEmbeddingFunction(build_database.EMBEDDING_MODEL)
+    embedder(chunks[:8])  # Isınma
+    for sort_by_length in (False, True):
+        for encode_batch_size in encode_batch_sizes:
+            embedder.encode_batch_size = encode_batch_size
+            embedder.sort_by_length = sort_by_length
+            start = time.perf_counter()
+            embedder(chunks)
+            duration = time.perf_counter() - start
+            print(
+                f"encode batch={encode_batch_size:<4} siralama={'acik ' if sort_by_length else 'kapali'}  "
+                f"sure={duration:7.2f}s  {len(chunks) / duration:7.1f} parca/s"
+            )
+
+
+def _legacy_primary_intent(query: str):
+    """Eski kural motorundaki if/elif + any() niyet taraması (karşılaştırma için)."""
+    query_lower = query.lower()
+    for intent, keywords in QUERY_INTENTS:
+        if any(word in query_lower for word in keywords):
+            return intent
+    return None
+
+
+def _legacy_relevant_sentences(text: str, info_type: str) -> List[str]:
+    """Eski extract_medical_info cümle taraması: her cümle ve anahtar kelime için lower()."""
+    relevant_sentences = []
+    for sentence in text.split('.'):
+        if any(keyword in sentence.lower() for keyword in SENTENCE_KEYWORDS.get(info_type, [])):
+            relevant_sentences.append(sentence.strip())
+    return relevant_sentences
+
+
+_SAMPLE_SENTENCES = [
+    "Etken madde: her film kaplı tablet 500 mg parasetamol içerir",
+    "Yetişkinlerde önerilen doz günde 3-4 kez 1 tablettir",
+    "Tabletler bir bardak su ile aç veya tok karnına alınır",
+    "Çok yaygın olmayan yan etkiler arasında deri döküntüsü ve kaşıntı görülebilir",
+    "Ciddi bir alerjik reaksiyon fark ederseniz ilacı kullanmayı bırakınız",
+    "Karaciğer yetmezliği olan hastalar bu ilacı kullanmamalıdır",
+    "Hamilelik ve emzirme döneminde doktorunuza danışmadan kullanmayınız",
+    "Bu ilaç ağrı ve ateşin tedavisinde kullanılır",
+    "Çocukların göremeyeceği, erişemeyeceği yerlerde ve ambalajında saklayınız",
+    "Şurup 5 ml ölçek ile ölçülerek verilmelidir",
+    "Araç ve makine kullanımı üzerinde bilinen bir etkisi yoktur",
+    "Diğer ilaçlarla birlikte kullanımı hakkında doktorunuzu bilgilendiriniz",
+]
+
+_SAMPLE_QUERIES = [
+    "parol yan etkileri nelerdir", "aspirin günlük doz ne kadar", "majezik nasıl kullanılır",
+    "augmentin nedir", "kimler kullanmamalı", "gebelikte kullanılır mı",
+    "arveles ile alkol", "coraspin 100 mg",
+]
+
+
+def bench_intent(n_chunks: int, repeat: int, seed: int = 0):
+    """Niyet + cümle eşleştirmeyi gerçekçi parça boyunda eski any() taramasıyla karşılaştırır.
+
+    "tek niyet" kural motorunun istek başına yoludur (sorgu niyeti + o niyetin
+    cümleleri); "tum niyetler" parçadaki bütün etiketlerin cümle eşleşmeleridir.
+    """
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(n_chunks):
+        sentences = []
+        while sum(len(sentence) + 2 for sentence in sentences) < build_database.CHUNK_SIZE:
+            sentences.append(rng.choice(_SAMPLE_SENTENCES))
+        chunks.append(". ".join(sentences).lower() + ".")
+    requests = [(rng.choice(_SAMPLE_QUERIES), chunk) for chunk in chunks]
+
+    matcher = IntentMatcher()
+
+    def legacy(query, chunk):
+        intent = _legacy_primary_intent(query)
+        return intent, _legacy_relevant_sentences(chunk, intent) if intent else []
+
+    def compiled(query, chunk):
+        intent = matcher.primary(query)
+        if not intent:
+            return intent, []
+        sentences, hits = matcher.sentence_hits(chunk, intent)
+        return intent, [sentences[i].strip() for i in hits.get(intent, [])]
+
+    def legacy_all(query, chunk):
+        return _legacy_primary_intent(query), {
+            label: _legacy_relevant_sentences(chunk, label) for label in SENTENCE_KEYWORDS
+        }
+
+    def compiled_all(query, chunk):
+        sentences, hits = matcher.sentence_hits(chunk)
+        return matcher.primary(query), {
+            label: [sentences[i].strip() for i in hits.get(label, [])] for label in SENTENCE_KEYWORDS
+        }
+
+    mismatches = sum(
+        1 for query, chunk in requests
+        if legacy(query, chunk) != compiled(query, chunk) or legacy_all(query, chunk) != compiled_all(query, chunk)
+    )
+    keyword_count = sum(len(keywords) for _, keywords in QUERY_INTENTS) + sum(len(k) for k in SENTENCE_KEYWORDS.values())
+    avg_chars = sum(len(chunk) for chunk in chunks) / len(chunks)
+    print(f"{len(requests)} istek, parca ~{avg_chars:.0f} karakter, {keyword_count} anahtar kelime, farkli cikti: {mismatches}")
+
+    for name, fn in (("eski, tek niyet", legacy), ("yeni, tek niyet", compiled),
+                     ("eski, tum niyetler", legacy_all), ("yeni, tum niyetler", compiled_all)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for query, chunk in requests:
+                fn(query, chunk)
+        duration = (time.perf_counter() - start) / repeat
+        print(f"{name:<19}: {duration / len(requests) * 1e6:8.1f} us/istek")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ProspektAsistan performans ölçümleri")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = subparsers.add_parser("extract", help="PDF okuma + parçalama (seri vs süreç havuzu)")
+    extract_parser.add_argument("--limit", type=int, default=200, help="Ölçülecek PDF sayısı (0 = hepsi)")
+    extract_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Denenecek süreç sayıları; ilki referans alınır")
+
+    chunk_parser = subparsers.add_parser("chunk", help="chunk_text (eski vs yeni parçalayıcı)")
+    chunk_parser.add_argument("--limit", type=int, default=50, help="Metni kullanılacak PDF sayısı")
+    chunk_parser.add_argument("--repeat", type=int, default=5, help="Tekrar sayısı")
+
+    embed_parser = subparsers.add_parser("embed", help="Embedding hızı (encode batch boyutu ve uzunluk sıralaması)")
+    embed_parser.add_argument("--limit", type=int, default=20, help="Parçaları kullanılacak PDF sayısı")
+    embed_parser.add_argument("--max-chunks", type=int, default=2000, help="Kodlanacak en fazla parça sayısı")
+    embed_parser.add_argument("--encode-batch-sizes", type=int, nargs="+", default=[16, 32, 64, 128])
+
+    intent_parser = subparsers.add_parser("intent", help="Kural tabanlı niyet/cümle eşleştirme (any() taraması vs derlenmiş regex)")
+    intent_parser.add_argument("--chunks", type=int, default=500, help="Üretilecek parça sayısı (her biri ~CHUNK_SIZE karakter)")
+    intent_parser.add_argument("--repeat", type=int, default=5, help="Tekrar sayısı")
+
+    args = parser.parse_args()
+    if args.command == "extract":
+        bench_extract(args.limit, args.workers)
+    elif args.command == "chunk":
+        bench_chunk(args.limit, args.repeat)
+    elif args.command == "embed":
+        bench_embed(args.limit, args.encode_batch_sizes, args.max_chunks)
+    elif args.command == "intent":
+        bench_intent(args.chunks, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
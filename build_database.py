@@ -7,22 +7,45 @@ data/kub ve data/kt klasörlerindeki TÜM PDF'leri işleyerek anlamsal arama ver
 import os
 import json
 import time
+import uuid
+import hashlib
 import logging
+import argparse
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 
 import chromadb
-from chromadb.utils import embedding_functions
 from chromadb.config import Settings
+from sentence_transformers import SentenceTransformer
 import PyPDF2
 import pdfplumber
 from tqdm import tqdm
 
+from drug_matcher import DrugMatcher
+from embedding_cache import EmbeddingCache
+from ingest_pipeline import Pipeline, DEFAULT_QUEUE_SIZE
+from lexical_index import BM25Index
+from prospectus_sections import chunk_sections
+from sentence_index import SentenceIndex
+from text_cache import TextCache
+from turkish_text import fold
+
 # --- Konfigürasyon ---
 EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
 DISTANCE_FUNCTION = "cosine"
 DB_PATH = "data/veritabani_optimized"  # Optimized demo veritabanı
 COLLECTION_NAME = "ilac_prospektusleri"
+MANIFEST_PATH = f"{DB_PATH}_manifest.json"  # Artımlı derleme için dosya manifest'i
+CHECKPOINT_PATH = f"{DB_PATH}_checkpoint.jsonl"  # Yarıda kalan derleme için kontrol noktası günlüğü
+EMBEDDING_CACHE_DIR = "data/embedding_cache"  # Parça vektörleri önbelleği
+TEXT_CACHE_DIR = "data/text_cache"  # PDF'lerden çıkarılmış metin önbelleği
+LEXICAL_INDEX_PATH = f"{DB_PATH}_bm25.npz"  # Hibrit arama için BM25 indeksi
+LEXICAL_PAGE_SIZE = 5000  # İndeks kurulurken koleksiyondan sayfa sayfa okunan parça sayısı
+SENTENCE_INDEX_PATH = f"{DB_PATH}_sentences.npz"  # Cümle düzeyi alt indeks (+ _sentences.npy vektörler)
 
 # Türkiye'de en sık kullanılan ilaçların optimized listesi (demo için sınırlandırılmış)
 POPULAR_DRUGS = [
@@ -32,6 +55,10 @@ POPULAR_DRUGS = [
     "RAMIPRIL", "AMLODIPINE", "METOPROLOL", "CONCOR"
 ]
 
+# Tam ilaç listesi (satır başına bir ilaç adı); dosya yoksa POPULAR_DRUGS kullanılır
+DRUG_LIST_PATH = "data/ilac_listesi.txt"
+DRUG_MANIFEST_PATH = "data/ilac_dosya_manifest.json"  # İlaç -> PDF yolları eşlemesi
+
 # PDF klasörleri
 KUB_PATH = "data/kub"
 KT_PATH = "data/kt"
@@ -39,6 +66,42 @@ KT_PATH = "data/kt"
 # Metin parçalama ayarları (daha küçük chunks için optimize)
 CHUNK_SIZE = 800  # Daha küçük parçalar
 CHUNK_OVERLAP = 150  # Daha az örtüşme
+CHUNK_BOUNDARY_CHARS = (' ', '\n', '.', '!', '?')  # Parçaların kesilebileceği karakterler
+
+# Parça metadata'sı: alanlar değiştiğinde artırılır, eski manifest'le artımlı derleme yapılmaz
+METADATA_VERSION = 5  # 2: drug_name, drug_key, active_ingredient; 3: section; 4: normalize etkin madde; 5: ASCII metinde gürültü
+ACTIVE_INGREDIENT_MAX_CHARS = 120
+INGREDIENT_MANIFEST_PATH = "data/etken_madde_manifest.json"  # Etkin madde -> drug_key'ler (sorgu filtresi)
+# KÜB "2. KALİTATİF VE KANTİTATİF BİLEŞİM" ve KT "Etkin madde:" satırları
+ACTIVE_INGREDIENT_RE = re.compile(r"etkin madde(?:\s*\(?ler\)?)?\s*:\s*([^\n]*)(?:\n\s*([^\n]*))?", re.IGNORECASE)
+# Katlanmış (fold) metne uygulanır; "içerir" ve ASCII yazılmış "icerir" aynı biçimde yakalanır
+ACTIVE_INGREDIENT_NOISE_RE = re.compile(
+    r"\b(?:her\s+bir|her)\s+\S+|\d+(?:[.,]\d+)?|\b(?:mg|mcg|µg|g|ml|iu|ie)\b|%|"
+    r"\b(?:icerir|ihtiva\s+eder|bulunur|esdeger|olarak|etkin\s+madde\w*)\b|[():;•*]|"
+    r"\b(?:film|kapli|efervesan|tablet|kapsul|ampul|flakon|surup|suspansiyon|sase|doz)\w*"
+)
+ACTIVE_INGREDIENT_SPLIT_RE = re.compile(r"[,;+/]|\s+ve\s+", re.IGNORECASE)
+ACTIVE_INGREDIENT_PAREN_RE = re.compile(r"\([^)]*\)")  # "(amoksisiline eşdeğer)" gibi açıklamalar
+# Tuz ve hidrat adları etkin madde adından atılır: "amoksisilin trihidrat" -> "amoksisilin"
+ACTIVE_INGREDIENT_SALT_WORDS = frozenset(fold(word) for word in """
+    trihidrat dihidrat monohidrat hemihidrat seskihidrat anhidr anhidröz hidroklorür hidrobromür hcl
+    sodyum potasyum kalsiyum magnezyum sülfat fosfat asetat maleat besilat tartarat süksinat
+    fumarat sitrat mesilat bromür klorür
+""".split())
+
+# PDF okuma ayarları: PyPDF2 çıktısı bu eşiklerin altındaysa sayfa pdfplumber ile okunur
+LAYOUT_CHECK_MIN_CHARS = 200  # Bozukluk kontrolü için gereken en az karakter
+LAYOUT_MIN_READABLE_RATIO = 0.6  # Harf ve boşlukların en düşük oranı
+
+# Paralel PDF işleme ayarları
+DEFAULT_WORKERS = 1  # 1 = seri işleme (eski davranış)
+PREFETCH_PER_WORKER = 4  # İşçi başına kuyrukta bekleyen en fazla PDF sayısı
+HASH_BLOCK_SIZE = 1024 * 1024  # İçerik özeti hesaplanırken okunan blok boyutu
+
+# Veri alım hattı ayarları (aşama başına batch boyutları)
+EMBED_BATCH_SIZE = 512  # Embedding aşamasına tek seferde verilen parça sayısı (uzunluk sıralama penceresi)
+ENCODE_BATCH_SIZE = 64  # Modelin tek ileri geçişte kodladığı parça sayısı
+WRITE_BATCH_SIZE = 1000  # Tek upsert çağrısında yazılan parça sayısı
 
 # --- Logging Setup ---
 logging.basicConfig(
@@ -51,72 +114,218 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """PDF'den metin çıkarır."""
-    text = ""
-    
-    # Önce pdfplumber ile deneyelim
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        
-        if text.strip():
-            return text.strip()
-    except Exception as e:
-        logger.warning(f"pdfplumber ile okuma başarısız {pdf_path}: {e}")
-    
-    # pdfplumber başarısızsa PyPDF2 ile deneyelim
+class BatchedEmbeddingFunction:
+    """Chroma embedding fonksiyonu arayüzünde, batch boyutu ayarlanabilir kodlayıcı.
+
+    sort_by_length=True ise çağrıdaki tüm metinler tek encode çağrısında
+    uzunluğa göre sıralanarak kodlanır (benzer uzunluklar aynı batch'e düşer,
+    padding israfı azalır); False ise metinler geldikleri sırayla
+    encode_batch_size'lık gruplar halinde kodlanır. Kodlama süresi ve sayısı
+    hız raporu için tutulur.
+    """
+
+    def __init__(self, model_name: str, device: str = "cpu", encode_batch_size: int = ENCODE_BATCH_SIZE, sort_by_length: bool = True):
+        self._model = SentenceTransformer(model_name, device=device)
+        self.encode_batch_size = encode_batch_size
+        self.sort_by_length = sort_by_length
+        self.encoded = 0
+        self.encode_seconds = 0.0
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        start = time.perf_counter()
+        if self.sort_by_length:
+            vectors = self._model.encode(texts, batch_size=self.encode_batch_size, convert_to_numpy=True).tolist()
+        else:
+            vectors = []
+            for i in range(0, len(texts), self.encode_batch_size):
+                group = texts[i:i + self.encode_batch_size]
+                vectors.extend(self._model.encode(group, batch_size=len(group), convert_to_numpy=True).tolist())
+        self.encode_seconds += time.perf_counter() - start
+        self.encoded += len(texts)
+        return vectors
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.encoded / self.encode_seconds if self.encode_seconds else 0.0
+
+def _needs_layout_fallback(page_text: str) -> bool:
+    """PyPDF2 çıktısı boş ya da bozuk görünüyorsa sayfa pdfplumber ile yeniden okunur."""
+    stripped = page_text.strip()
+    if not stripped:
+        return True
+    if len(stripped) < LAYOUT_CHECK_MIN_CHARS:
+        return False
+    # Kelimeler bitişik çıktıysa ya da metin çoğunlukla harf dışı karakterlerse düzen bozuktur
+    readable = sum(1 for ch in stripped if ch.isalpha() or ch.isspace())
+    return stripped.count(' ') == 0 or readable / len(stripped) < LAYOUT_MIN_READABLE_RATIO
+
+def iter_pdf_pages(pdf_path: str, stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """PDF sayfalarının metnini tek tek üretir.
+
+    Önce hızlı olan PyPDF2 kullanılır; yalnızca metni boş ya da bozuk çıkan
+    sayfalar pdfplumber ile yeniden okunur. pdfplumber dosyası ilk ihtiyaçta
+    açılır ve okunan sayfanın önbelleği hemen boşaltılır, böylece büyük
+    prospektüsler sınırlı bellekle işlenir. stats verilirse sayfa sayısı,
+    pdfplumber'a düşen ve okunamayan sayfa sayıları ile süre yazılır.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(pages=0, fallback_pages=0, failed_pages=0, seconds=0.0)
+    start = time.perf_counter()
+    plumber = None
+    plumber_failed = False
     try:
         with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        
-        return text.strip()
+            try:
+                reader = PyPDF2.PdfReader(file)
+                page_count = len(reader.pages)
+            except Exception as e:
+                logger.warning(f"PyPDF2 ile okuma başarısız {pdf_path}: {e}")
+                reader = None
+                plumber = pdfplumber.open(pdf_path)
+                page_count = len(plumber.pages)
+
+            for page_number in range(page_count):
+                page_text = ""
+                if reader is not None:
+                    try:
+                        page_text = reader.pages[page_number].extract_text() or ""
+                    except Exception as e:
+                        logger.debug(f"PyPDF2 sayfa {page_number + 1} okunamadi {pdf_path}: {e}")
+
+                if not plumber_failed and _needs_layout_fallback(page_text):
+                    try:
+                        if plumber is None:
+                            try:
+                                plumber = pdfplumber.open(pdf_path)
+                            except Exception:
+                                plumber_failed = True
+                                raise
+                        page = plumber.pages[page_number]
+                        fallback_text = page.extract_text() or ""
+                        page.flush_cache()
+                        if fallback_text.strip():
+                            page_text = fallback_text
+                        stats["fallback_pages"] += 1
+                    except Exception as e:
+                        logger.debug(f"pdfplumber sayfa {page_number + 1} okunamadi {pdf_path}: {e}")
+
+                stats["pages"] += 1
+                if page_text.strip():
+                    yield page_text
+                else:
+                    stats["failed_pages"] += 1
+    finally:
+        if plumber is not None:
+            plumber.close()
+        stats["seconds"] = time.perf_counter() - start
+
+def extract_text_from_pdf(pdf_path: str, stats: Optional[Dict[str, Any]] = None) -> str:
+    """PDF'den metin çıkarır. Okunamayan dosyada o ana kadar okunan metni döndürür
+    ve hatayı stats["error"] alanına yazar."""
+    stats = stats if stats is not None else {}
+    pages = []
+    try:
+        for page_text in iter_pdf_pages(pdf_path, stats):
+            pages.append(page_text)
     except Exception as e:
         logger.error(f"PDF okuma başarısız {pdf_path}: {e}")
-        return ""
+        stats["error"] = str(e)
+    return "\n".join(pages).strip()
 
 def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
-    """Metni örtüşen parçalara böler."""
-    if len(text) <= chunk_size:
+    """Metni örtüşen parçalara böler.
+
+    Her parça için hedef sonun gerisindeki en yakın kesme noktası (boşluk,
+    satır sonu, '.', '!', '?') str.rfind ile C hızında bulunur. Nokta parçanın
+    başına örtüşmeden daha yakınsa sonraki parça örtüşmesiz başlar, böylece
+    her adımda ileri gidilir.
+    """
+    text_length = len(text)
+    if text_length <= chunk_size:
         return [text]
     
     chunks = []
     start = 0
     
-    while start < len(text):
+    while start < text_length:
         end = start + chunk_size
         
-        # Kelime sınırlarında kesmeye çalış
-        if end < len(text):
-            # Geriye doğru en yakın boşluğu bul
-            while end > start and text[end] not in [' ', '\n', '.', '!', '?']:
-                end -= 1
-            
-            if end == start:  # Boşluk bulunamadıysa orijinal konumu kullan
-                end = start + chunk_size
+        # Kelime sınırlarında kesmeye çalış: (start, end] aralığındaki son sınır
+        if end < text_length:
+            boundary = max(text.rfind(char, start + 1, end + 1) for char in CHUNK_BOUNDARY_CHARS)
+            if boundary > start:
+                end = boundary
         
         chunk = text[start:end].strip()
         if chunk:
             chunks.append(chunk)
         
-        start = end - overlap
-        if start >= len(text):
-            break
+        next_start = end - overlap
+        start = next_start if next_start > start else end
     
     return chunks
 
-def find_all_pdfs() -> List[Dict[str, str]]:
-    """Sık kullanılan ilaçlar listesindeki PDF'leri bulur."""
+def normalize_active_ingredient(name: str) -> str:
+    """Etkin madde adını katlanmış, tuz/hidrat eki atılmış biçime getirir; ad değilse ''."""
+    words = [word for word in ACTIVE_INGREDIENT_NOISE_RE.sub(" ", fold(name)).split() if len(word) > 2]
+    base = [word for word in words if word not in ACTIVE_INGREDIENT_SALT_WORDS]
+    return " ".join(base or words).strip(" .,-")[:ACTIVE_INGREDIENT_MAX_CHARS]
+
+def extract_active_ingredients(text: str) -> List[str]:
+    """Prospektüsün "Etkin madde:" satırındaki etkin maddeleri normalize adlarıyla döndürür.
+
+    "Etkin madde: Her bir tablet 500 mg parasetamol içerir." -> ["parasetamol"].
+    "Amoksisilin trihidrat (amoksisiline eşdeğer) 875 mg, potasyum klavulanat ..."
+    -> ["amoksisilin", "klavulanat"]. İki nokta üst üsteden sonra satır boşsa
+    (KÜB tablosu) sonraki satıra bakılır.
+    """
+    match = ACTIVE_INGREDIENT_RE.search(text)
+    if not match:
+        return []
+    line = match.group(1).strip() or (match.group(2) or "").strip()
+    names = []
+    for part in ACTIVE_INGREDIENT_SPLIT_RE.split(ACTIVE_INGREDIENT_PAREN_RE.sub(" ", line)):
+        name = normalize_active_ingredient(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def load_drug_matcher(drug_list_path: Optional[str] = None) -> DrugMatcher:
+    """İlaç listesi dosyasından (yoksa POPULAR_DRUGS'tan) eşleştirici kurar."""
+    drug_list_path = drug_list_path or DRUG_LIST_PATH
+    if os.path.exists(drug_list_path):
+        matcher = DrugMatcher.from_file(drug_list_path)
+        logger.info(f"Ilac listesi yuklendi: {drug_list_path} ({len(matcher)} ilac)")
+    else:
+        matcher = DrugMatcher(POPULAR_DRUGS)
+        logger.info(f"Ilac listesi dosyasi yok, sik kullanilan {len(matcher)} ilac kullaniliyor.")
+    return matcher
+
+def save_drug_manifest(drug_files: Dict[str, List[str]]):
+    """İlaç -> PDF yolları eşlemesini sonraki aşamaların kullanması için yazar."""
+    tmp_path = DRUG_MANIFEST_PATH + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(drug_files, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, DRUG_MANIFEST_PATH)
+
+def load_drug_manifest() -> Dict[str, List[str]]:
+    """find_all_pdfs'in yazdığı ilaç -> PDF yolları eşlemesini okur."""
+    with open(DRUG_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def find_all_pdfs(drug_list_path: Optional[str] = None, all_pdfs: bool = False) -> List[Dict[str, str]]:
+    """İlaç listesindeki PDF'leri bulur.
+
+    Dosya adları, ilaç listesinden bir kez kurulan Aho-Corasick otomatıyla
+    taranır; eşleşme süresi listedeki ilaç sayısından bağımsızdır. all_pdfs=True
+    ise eşleşmeyen PDF'ler de (drug_name=None) derlemeye alınır. Bulunan
+    ilaç -> dosya eşlemesi DRUG_MANIFEST_PATH'e yazılır.
+    """
     pdfs = []
-    logger.info(f"Sık kullanılan ilaçlar listesine göre PDF'ler aranıyor: {POPULAR_DRUGS}")
-    found_drugs = set()
+    matcher = load_drug_matcher(drug_list_path)
+    logger.info("Tum PDF'ler aliniyor (tum korpus modu)." if all_pdfs else "Ilac listesine gore PDF'ler araniyor.")
+    drug_files: Dict[str, List[str]] = {}
 
     # Her iki klasörde de ara
     search_paths = [
@@ -130,41 +339,419 @@ def find_all_pdfs() -> List[Dict[str, str]]:
             continue
             
         # Tüm PDF dosyalarını listele
-        for pdf_file in Path(search_path).glob("*.pdf"):
-            file_name_upper = pdf_file.stem.upper()
+        for pdf_file in sorted(Path(search_path).glob("*.pdf")):
+            # Dosya adındaki en uzun ilaç adı (büyük/küçük harf ve Türkçe karakter duyarsız)
+            drug_name = matcher.best_match(pdf_file.stem)
+            if drug_name is None and not all_pdfs:
+                continue
             
-            # Her ilaç adını dosya adında ara (büyük/küçük harf duyarsız)
-            for drug_name in POPULAR_DRUGS:
-                if drug_name.upper() in file_name_upper:
-                    pdfs.append({
-                        "path": str(pdf_file),
-                        "type": doc_type,
-                        "name": pdf_file.stem
-                    })
-                    found_drugs.add(drug_name)
-                    break  # Bu dosya için sadece bir kez ekle
-
-    logger.info(f"Bulunan sık kullanılan ilaçlar: {sorted(list(found_drugs))}")
+            pdfs.append({
+                "path": str(pdf_file),
+                "type": doc_type,
+                "name": pdf_file.stem,
+                "drug_name": drug_name
+            })
+            if drug_name is not None:
+                drug_files.setdefault(drug_name, []).append(str(pdf_file))
+
+    save_drug_manifest(drug_files)
+    logger.info(f"Bulunan ilac sayisi: {len(drug_files)} (manifest: {DRUG_MANIFEST_PATH})")
     logger.info(f"Toplam bulunan PDF dosyası sayısı: {len(pdfs)}")
     return pdfs
 
-def create_database():
-    """Ana veritabanı oluşturma fonksiyonu."""
+def file_sha256(path: str) -> str:
+    """Dosya içeriğinin SHA-256 özetini döndürür."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def failed_result(pdf_info: Dict[str, str], error: str) -> Dict[str, Any]:
+    return {"pdf": pdf_info, "text_found": False, "chunks": [], "error": error}
+
+def process_pdf(pdf_info: Dict[str, str], text_cache: Optional[TextCache] = None) -> Dict[str, Any]:
+    """Tek bir PDF'i okuyup parçalar. İşçi süreçlerde çalışır, hatayı sonuca yazar.
+
+    text_cache verilirse aynı içerikli PDF'in metni önbellekten okunur; yoksa
+    çıkarılan metin önbelleğe yazılır. Yarıda kalan, sayfası okunamayan ya da
+    boş çıkan metin yazılmaz; sonraki derleme çıkarmayı yeniden dener.
+    """
+    try:
+        stat = os.stat(pdf_info["path"])
+        fingerprint = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": file_sha256(pdf_info["path"])
+        }
+        text_stored = False  # Bu çağrıda önbelleğe yeni blob yazıldı mı
+        cached = text_cache.get(fingerprint["sha256"]) if text_cache is not None else None
+        if cached is not None:
+            text, extract_stats = cached
+            extract_stats["cached"] = True
+        else:
+            extract_stats = {}
+            text = extract_text_from_pdf(pdf_info["path"], extract_stats)
+            extract_stats["cached"] = False
+            extracted = text and not extract_stats.get("error") and not extract_stats.get("failed_pages")
+            if text_cache is not None and extracted:
+                text_cache.put(fingerprint["sha256"], text, extract_stats)
+                text_stored = True
+        chunks = chunk_text(text) if text else []
+        return {
+            "pdf": pdf_info,
+            "fingerprint": fingerprint,
+            "extract_stats": extract_stats,
+            "text_stored": text_stored,
+            "text_found": bool(text),
+            "text_chars": len(text),
+            "chunks": chunks,
+            "sections": chunk_sections(text, chunks) if chunks else [],
+            "active_ingredients": extract_active_ingredients(text) if text else [],
+            "error": None
+        }
+    except Exception as e:
+        return failed_result(pdf_info, str(e))
+
+def process_pdf_isolated(pdf_info: Dict[str, str], text_cache: Optional[TextCache] = None) -> Dict[str, Any]:
+    """PDF'i tek işçili yeni bir süreç havuzunda işler; süreç çökerse yalnızca bu dosya hatalı sayılır."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return executor.submit(process_pdf, pdf_info, text_cache).result()
+        except BrokenProcessPool as e:
+            logger.error(f"Isci surec bu dosyada coktu: {pdf_info['path']}: {e}")
+            return failed_result(pdf_info, f"BrokenProcessPool: {e}")
+        except Exception as e:
+            return failed_result(pdf_info, str(e))
+
+def iter_processed_pdfs(
+    pdf_files: Iterable[Dict[str, str]],
+    workers: int = DEFAULT_WORKERS,
+    text_cache: Optional[TextCache] = None
+) -> Iterator[Dict[str, Any]]:
+    """PDF'leri işler ve sonuçları giriş sırasıyla döndürür.
+
+    workers > 1 ise okuma ve parçalama bir süreç havuzuna dağıtılır. Bellek
+    kullanımını sınırlamak için aynı anda en fazla workers * PREFETCH_PER_WORKER
+    PDF kuyrukta bekler. Bir işçi süreç çökerse (BrokenProcessPool; sonuç
+    beklerken ya da iş gönderirken) havuz yeniden kurulur. Çökmeyi hangi dosyanın
+    yaptığı bilinmediği için bitmemiş dosyalar tek tek yeni bir havuzda yeniden
+    işlenir; yalnızca kendi başına çökerten dosya hatalı sayılır.
+    """
+    if workers <= 1:
+        for pdf_info in pdf_files:
+            yield process_pdf(pdf_info, text_cache)
+        return
+
+    remaining = iter(pdf_files)
+    max_pending = workers * PREFETCH_PER_WORKER
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()  # (pdf_info, future); gönderilemeyen dosyada future None
+
+    def fill():
+        while len(pending) < max_pending:
+            pdf_info = next(remaining, None)
+            if pdf_info is None:
+                return
+            try:
+                future = executor.submit(process_pdf, pdf_info, text_cache)
+            except BrokenProcessPool:
+                pending.append((pdf_info, None))
+                raise
+            pending.append((pdf_info, future))
+
+    try:
+        while True:
+            try:
+                fill()
+                if not pending:
+                    break
+                pdf_info, future = pending[0]
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    # Yalnızca bu dosyanın hatası (ör. sonuç aktarılamadı); fill() hataları yukarı çıkar
+                    result = failed_result(pdf_info, str(e))
+                pending.popleft()
+            except BrokenProcessPool as e:
+                in_flight = list(pending)
+                pending.clear()
+                logger.error(f"Isci surec coktu, havuz yeniden baslatiliyor; "
+                             f"{len(in_flight)} dosya tek tek yeniden isleniyor: {e}")
+                executor.shutdown(wait=False, cancel_futures=True)
+                for pdf_info, future in in_flight:
+                    # Çökmeden önce biten işlerin sonucu geçerlidir
+                    if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+                        yield future.result()
+                    else:
+                        yield process_pdf_isolated(pdf_info, text_cache)
+                executor = ProcessPoolExecutor(max_workers=workers)
+                continue
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def load_manifest() -> Optional[Dict[str, Any]]:
+    """Önceki derlemenin manifest dosyasını okur; yoksa ya da bozuksa None döner."""
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Manifest okunamadi {MANIFEST_PATH}: {e}")
+        return None
+
+def save_manifest(files: Dict[str, Dict[str, Any]]):
+    """Manifest'i atomik olarak yazar (önce geçici dosya, sonra yer değiştirme)."""
+    manifest = {
+        "embedding_model": EMBEDDING_MODEL,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "collection": COLLECTION_NAME,
+        "metadata_version": METADATA_VERSION,
+        # Her derlemede değişir; API yanıt önbelleğini bununla geçersiz kılar
+        "build_id": uuid.uuid4().hex,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": files
+    }
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def manifest_is_compatible(manifest: Dict[str, Any]) -> bool:
+    """Manifest mevcut model, parçalama ve metadata ayarlarıyla üretilmiş mi?"""
+    return (
+        manifest.get("embedding_model") == EMBEDDING_MODEL
+        and manifest.get("chunk_size") == CHUNK_SIZE
+        and manifest.get("chunk_overlap") == CHUNK_OVERLAP
+        and manifest.get("collection") == COLLECTION_NAME
+        and manifest.get("metadata_version") == METADATA_VERSION
+    )
+
+class CheckpointJournal:
+    """Derleme sırasında parçaları eksiksiz yazılmış PDF'lerin günlüğü.
+
+    İlk satır derleme modunu ve ayarlarını, sonraki her satır bir PDF'in
+    manifest kaydını tutar. Her yazma batch'inden sonra diske zorlanır
+    (fsync); derleme başarıyla bitince silinir. Süreç yarıda ölürse --resume
+    bu günlükteki dosyaları atlayarak devam eder.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def load(self) -> Optional[tuple]:
+        """(başlık, {yol: manifest kaydı}) döndürür; günlük yoksa ya da uyumsuzsa None."""
+        if not os.path.exists(self.path):
+            return None
+        header, files = None, {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Yarım yazılmış son satır
+                if header is None:
+                    header = entry
+                else:
+                    files[entry["path"]] = entry["entry"]
+        if header is None or not manifest_is_compatible(header):
+            logger.warning("Kontrol noktasi farkli ayarlarla yazilmis, kullanilmayacak.")
+            return None
+        return header, files
+
+    def start(self, mode: str):
+        """Yeni bir günlük başlatır (eskisinin üzerine yazar)."""
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._write([{
+            "mode": mode,
+            "embedding_model": EMBEDDING_MODEL,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "collection": COLLECTION_NAME,
+            "metadata_version": METADATA_VERSION,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }])
+
+    def reopen(self):
+        """Var olan günlüğe eklemeye devam eder."""
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def commit(self, files: Dict[str, Dict[str, Any]]):
+        self._write([{"path": path, "entry": entry} for path, entry in files.items()])
+
+    def _write(self, entries: List[Dict[str, Any]]):
+        self._file.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def remove(self):
+        """Derleme bitince günlüğü kapatıp siler."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def plan_incremental_build(pdf_files: List[Dict[str, str]], previous_files: Dict[str, Dict[str, Any]]):
+    """PDF'leri değişmeyen, yeniden işlenecek ve silinen olarak ayırır.
+
+    Boyut ve değişiklik zamanı aynıysa dosya okunmaz; farklıysa içerik özeti
+    karşılaştırılır, böylece yalnızca dokunulmuş (touch) dosyalar yeniden
+    işlenmez.
+    """
+    unchanged = {}
+    to_process = []
+    current_paths = set()
+
+    for pdf_info in pdf_files:
+        path = pdf_info["path"]
+        current_paths.add(path)
+        previous = previous_files.get(path)
+        if previous is None:
+            to_process.append(pdf_info)
+            continue
+
+        if previous["sha256"] is None:
+            to_process.append(pdf_info)
+            continue
+
+        stat = os.stat(path)
+        if previous["size"] == stat.st_size and previous["mtime"] == stat.st_mtime:
+            unchanged[path] = previous
+            continue
+
+        if previous["size"] == stat.st_size and previous["sha256"] == file_sha256(path):
+            unchanged[path] = dict(previous, mtime=stat.st_mtime)
+            continue
+
+        to_process.append(pdf_info)
+
+    removed = {path: entry for path, entry in previous_files.items() if path not in current_paths}
+    return unchanged, to_process, removed
+
+def iter_collection_documents(collection, page_size: int = LEXICAL_PAGE_SIZE) -> Iterator[tuple]:
+    """Koleksiyondaki tüm (parça kimliği, metin, drug_key, section) kayıtlarını sayfa sayfa üretir."""
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            metadata = metadata or {}
+            yield chunk_id, document, metadata.get("drug_key") or None, metadata.get("section") or None
+        offset += len(page["ids"])
+
+def build_lexical_index(collection) -> BM25Index:
+    """Koleksiyonun tamamından BM25 indeksini kurar ve LEXICAL_INDEX_PATH'e yazar.
+
+    Artımlı derlemelerde de baştan kurulur; koleksiyonla her zaman birebir tutarlıdır.
+    """
+    started = time.time()
+    index = BM25Index.build(iter_collection_documents(collection))
+    index.save(LEXICAL_INDEX_PATH)
+    logger.info(
+        f"BM25 indeksi olusturuldu: {len(index)} parca, {len(index.vocab)} terim, "
+        f"{os.path.getsize(LEXICAL_INDEX_PATH) / 1024 / 1024:.1f} MB, {time.time() - started:.2f}s "
+        f"({LEXICAL_INDEX_PATH})"
+    )
+    return index
+
+def build_ingredient_manifest(collection, page_size: int = LEXICAL_PAGE_SIZE) -> Dict[str, List[str]]:
+    """Koleksiyon metadata'sından etkin madde -> drug_key'ler eşlemesini INGREDIENT_MANIFEST_PATH'e yazar.
+
+    API, ilaç adı geçmeyen sorgularda tanıdığı etkin maddeyi bu eşlemeyle
+    "drug_key $in [...]" filtresine çevirir ("parasetamol" -> parol, a-ferin, ...).
+    """
+    drugs_by_ingredient: Dict[str, set] = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        for metadata in page["metadatas"]:
+            metadata = metadata or {}
+            drug_key = metadata.get("drug_key")
+            if not drug_key:
+                continue
+            for ingredient in (metadata.get("active_ingredient") or "").split(","):
+                if ingredient.strip():
+                    drugs_by_ingredient.setdefault(ingredient.strip(), set()).add(drug_key)
+        offset += len(page["ids"])
+
+    manifest = {ingredient: sorted(drug_keys) for ingredient, drug_keys in sorted(drugs_by_ingredient.items())}
+    tmp_path = INGREDIENT_MANIFEST_PATH + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, INGREDIENT_MANIFEST_PATH)
+    logger.info(f"Etkin madde eslemesi olusturuldu: {len(manifest)} etkin madde ({INGREDIENT_MANIFEST_PATH})")
+    return manifest
+
+def build_sentence_index(collection, embed) -> SentenceIndex:
+    """Koleksiyonun parçalarını cümlelere bölüp cümle indeksini SENTENCE_INDEX_PATH'e yazar.
+
+    embed, parça vektörleriyle aynı yoldan (embedding önbelleği) geçer; metni
+    değişmeyen cümleler sonraki derlemelerde yeniden kodlanmaz.
+    """
+    started = time.time()
+    documents = ((chunk_id, document) for chunk_id, document, *_ in iter_collection_documents(collection))
+    index = SentenceIndex.build(SENTENCE_INDEX_PATH, documents, embed)
+    logger.info(
+        f"Cumle indeksi olusturuldu: {len(index.chunk_ids)} parca, {len(index)} cumle, "
+        f"{os.path.getsize(SentenceIndex.embeddings_path(SENTENCE_INDEX_PATH)) / 1024 / 1024:.1f} MB vektor, "
+        f"{time.time() - started:.2f}s ({SENTENCE_INDEX_PATH})"
+    )
+    return index
+
+def create_database(
+    workers: int = DEFAULT_WORKERS,
+    drug_list_path: Optional[str] = None,
+    all_pdfs: bool = False,
+    incremental: bool = False,
+    resume: bool = False,
+    use_text_cache: bool = True,
+    use_embedding_cache: bool = True,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    encode_batch_size: int = ENCODE_BATCH_SIZE,
+    sort_by_length: bool = True,
+    write_batch_size: int = WRITE_BATCH_SIZE,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    lexical_index: bool = True,
+    sentence_index: bool = True
+):
+    """Ana veritabanı oluşturma fonksiyonu.
+
+    incremental=True ise manifest'e göre yalnızca eklenen, değişen veya silinen
+    PDF'lerin parçaları güncellenir; aksi halde koleksiyon sıfırdan oluşturulur.
+    resume=True ise yarıda kalmış derlemenin kontrol noktasından devam edilir.
+    """
     logger.info("İlaç Veritabanı Oluşturma Başlıyor...")
     start_time = time.time()
     
     # --- 1. Embedding Fonksiyonunu Yükle ---
     logger.info(f"{EMBEDDING_MODEL} modeli yükleniyor...")
     try:
-        sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=EMBEDDING_MODEL,
-            device="cpu"
+        sentence_transformer_ef = BatchedEmbeddingFunction(
+            EMBEDDING_MODEL,
+            device="cpu",
+            encode_batch_size=encode_batch_size,
+            sort_by_length=sort_by_length
         )
         logger.info("Embedding modeli başarıyla yüklendi.")
     except Exception as e:
         logger.error(f"Embedding modeli yüklenemedi: {e}")
         return False
     
+    # Vektörler önbellek üzerinden hesaplanır, değişmeyen parçalar tekrar kodlanmaz
+    embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, EMBEDDING_MODEL) if use_embedding_cache else None
+    # Çıkarılmış metin önbelleği: parçalama ayarı denemelerinde PDF'ler yeniden ayrıştırılmaz
+    text_cache = TextCache(TEXT_CACHE_DIR) if use_text_cache else None
+    
     # --- 2. ChromaDB İstemcisini Başlat ---
     os.makedirs(DB_PATH, exist_ok=True)
     client = chromadb.PersistentClient(
@@ -172,106 +759,358 @@ def create_database():
         settings=Settings(allow_reset=True, anonymized_telemetry=False)
     )
     
-    # Eski koleksiyonu sil ve yenisini oluştur
-    try:
-        client.delete_collection(name=COLLECTION_NAME)
-        logger.info("Eski koleksiyon silindi.")
-    except:
-        pass
+    previous_files = None
+    checkpoint = CheckpointJournal(CHECKPOINT_PATH)
+    interrupted = checkpoint.load() if resume else None
+    if resume and interrupted is None:
+        logger.info("Devam edilecek kontrol noktasi bulunamadi, normal derleme yapilacak.")
     
-    collection = client.create_collection(
-        name=COLLECTION_NAME,
-        metadata={"hnsw:space": DISTANCE_FUNCTION},
-        embedding_function=sentence_transformer_ef
-    )
-    logger.info(f"'{COLLECTION_NAME}' koleksiyonu '{DISTANCE_FUNCTION}' mesafe fonksiyonu ile oluşturuldu.")
+    if interrupted is not None:
+        # Yarıda kalan derlemeye devam: koleksiyon silinmez, yazılmış PDF'ler atlanır
+        header, committed_files = interrupted
+        collection = client.get_or_create_collection(
+            name=COLLECTION_NAME,
+            metadata={"hnsw:space": DISTANCE_FUNCTION},
+            embedding_function=sentence_transformer_ef
+        )
+        previous_files = {}
+        if header["mode"] == "incremental":
+            manifest = load_manifest()
+            previous_files = manifest["files"] if manifest and manifest_is_compatible(manifest) else {}
+        previous_files.update(committed_files)
+        checkpoint.reopen()
+        logger.info(f"Kontrol noktasindan devam ediliyor: {len(committed_files)} PDF daha once yazilmis.")
+    elif incremental:
+        manifest = load_manifest()
+        if manifest is None:
+            logger.info("Manifest bulunamadi, tam derleme yapilacak.")
+        elif not manifest_is_compatible(manifest):
+            logger.warning("Manifest farkli model/parcalama/metadata ayarlariyla uretilmis, tam derleme yapilacak.")
+        else:
+            collection = client.get_or_create_collection(
+                name=COLLECTION_NAME,
+                metadata={"hnsw:space": DISTANCE_FUNCTION},
+                embedding_function=sentence_transformer_ef
+            )
+            has_chunks = any(entry["chunk_ids"] for entry in manifest["files"].values())
+            if has_chunks and collection.count() == 0:
+                logger.warning("Koleksiyon bos ama manifest dolu, tam derleme yapilacak.")
+            else:
+                previous_files = manifest["files"]
+                logger.info(f"Artimli derleme: manifest'te {len(previous_files)} PDF kayitli.")
+        if previous_files is not None:
+            checkpoint.start("incremental")
+    
+    if previous_files is None:
+        # Eski koleksiyonu sil ve yenisini oluştur
+        try:
+            client.delete_collection(name=COLLECTION_NAME)
+            logger.info("Eski koleksiyon silindi.")
+        except:
+            pass
+        
+        collection = client.create_collection(
+            name=COLLECTION_NAME,
+            metadata={"hnsw:space": DISTANCE_FUNCTION},
+            embedding_function=sentence_transformer_ef
+        )
+        logger.info(f"'{COLLECTION_NAME}' koleksiyonu '{DISTANCE_FUNCTION}' mesafe fonksiyonu ile oluşturuldu.")
+        previous_files = {}
+        checkpoint.start("full")
     
     # --- 3. PDF'leri Bul ---
-    pdf_files = find_all_pdfs()
+    pdf_files = find_all_pdfs(drug_list_path=drug_list_path, all_pdfs=all_pdfs)
     logger.info(f"Toplam {len(pdf_files)} PDF dosyası bulundu.")
     
     if not pdf_files:
         logger.error("Hic PDF dosyasi bulunamadi!")
         return False
     
+    manifest_files, to_process, removed = plan_incremental_build(pdf_files, previous_files)
+    logger.info(
+        f"Degismeyen: {len(manifest_files)}, islenecek: {len(to_process)}, silinecek: {len(removed)} PDF"
+    )
+    
+    # Kaldırılan PDF'lerin parçalarını sil
+    removed_ids = [chunk_id for entry in removed.values() for chunk_id in entry["chunk_ids"]]
+    if removed_ids:
+        collection.delete(ids=removed_ids)
+        logger.info(f"Silinen PDF'lere ait {len(removed_ids)} parca kaldirildi.")
+    
     # --- 4. PDF'leri İşle ---
+    # Aşamalar: okuma (süreç havuzu) -> parçalama -> embedding -> yazma
     total_chunks = 0
-    batch_size = 50  # Bellek kullanımını kontrol etmek için
-    batch_docs = []
-    batch_ids = []
-    batch_metadatas = []
+    text_cache_hits = 0
+    failed_paths = set()
+    progress = tqdm(total=len(to_process), desc="PDF'ler işleniyor")
     
-    for i, pdf_info in enumerate(tqdm(pdf_files, desc="PDF'ler işleniyor")):
-        pdf_path = pdf_info["path"]
-        pdf_type = pdf_info["type"]
-        pdf_name = pdf_info["name"]
-        
-        # Loglama
-        logger.info(f"[{i+1}/{len(pdf_files)}] Isleniyor: {pdf_path}")
-        
-        text = extract_text_from_pdf(pdf_path)
-        if not text:
-            logger.warning(f"Metin cikarilamadi: {pdf_path}")
-            continue
+    def chunk_stage(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """PDF sonuçlarını kimlik ve metadata'sı belirlenmiş parça kayıtlarına çevirir."""
+        nonlocal total_chunks, text_cache_hits
+        records = []
+        for result in results:
+            pdf_info = result["pdf"]
+            pdf_path = pdf_info["path"]
+            pdf_type = pdf_info["type"]
+            pdf_name = pdf_info["name"]
+            progress.update(1)
+            extract_stats = result.get("extract_stats") or {}
+            logger.info(
+                f"[{progress.n}/{len(to_process)}] Isleniyor: {pdf_path} "
+                f"({extract_stats.get('pages', 0)} sayfa, {extract_stats.get('fallback_pages', 0)} pdfplumber, "
+                f"{extract_stats.get('failed_pages', 0)} okunamadi, {extract_stats.get('seconds', 0.0):.2f}s"
+                f"{', metin onbellekten' if extract_stats.get('cached') else ''})"
+            )
+            if extract_stats.get("cached"):
+                text_cache_hits += 1
+            elif text_cache is not None and result.get("text_stored"):
+                text_cache.record(pdf_path, result["fingerprint"]["sha256"], extract_stats, result["text_chars"])
             
-        chunks = chunk_text(text)
-        if not chunks:
-            logger.warning(f"Metin parcalanamadi: {pdf_path}")
-            continue
-        
-        num_chunks = len(chunks)
-        total_chunks += num_chunks
-        
-        # Her bir chunk için ID ve metadata oluştur
-        for j, chunk in enumerate(chunks):
-            chunk_id = f"{pdf_name}_{j}"
+            previous = previous_files.get(pdf_path)
+            if result["error"]:
+                logger.error(f"PDF islenemedi {pdf_path}: {result['error']}")
+                if previous:
+                    # Eski parçalar koleksiyonda duruyor; kimlikleri unutulmasın
+                    manifest_files[pdf_path] = dict(previous, sha256=None)
+                continue
             
-            metadata = {
-                "source": pdf_name,
-                "type": pdf_type,
-                "chunk_index": j,
-                "total_chunks_in_doc": num_chunks,
-                "pdf_path": pdf_path
-            }
+            chunks = result["chunks"]
+            chunk_ids = [f"{pdf_name}_{j}" for j in range(len(chunks))]
             
-            batch_docs.append(chunk)
-            batch_ids.append(chunk_id)
-            batch_metadatas.append(metadata)
+            # Değişen dosyanın artık kullanılmayan eski parçalarını sil
+            if previous:
+                stale_ids = sorted(set(previous["chunk_ids"]) - set(chunk_ids))
+                if stale_ids:
+                    records.append({"delete_ids": stale_ids})
             
-            # Batch dolduğunda veritabanına ekle
-            if len(batch_docs) >= batch_size:
-                try:
-                    collection.add(
-                        documents=batch_docs,
-                        ids=batch_ids,
-                        metadatas=batch_metadatas
-                    )
-                    logger.info(f"{len(batch_docs)} parca veritabanina eklendi.")
-                    batch_docs, batch_ids, batch_metadatas = [], [], []
-                except Exception as e:
-                    logger.error(f"Veritabanina ekleme hatasi: {e}")
+            manifest_files[pdf_path] = dict(result["fingerprint"], chunk_ids=chunk_ids)
+            
+            if not result["text_found"]:
+                logger.warning(f"Metin cikarilamadi: {pdf_path}")
+                records.append({"file_done": pdf_path})
+                continue
+                
+            if not chunks:
+                logger.warning(f"Metin parcalanamadi: {pdf_path}")
+                records.append({"file_done": pdf_path})
+                continue
+            
+            num_chunks = len(chunks)
+            total_chunks += num_chunks
+            # Chroma metadata'sı None kabul etmez; bilinmeyen değerler boş dize olarak yazılır
+            drug_name = pdf_info.get("drug_name") or ""
+            sections = result.get("sections") or [""] * num_chunks
+            
+            # Her bir chunk için ID ve metadata oluştur
+            for j, (chunk, chunk_id) in enumerate(zip(chunks, chunk_ids)):
+                records.append({
+                    "id": chunk_id,
+                    "document": chunk,
+                    "path": pdf_path,
+                    "metadata": {
+                        "source": pdf_name,
+                        "type": pdf_type,
+                        "chunk_index": j,
+                        "total_chunks_in_doc": num_chunks,
+                        "pdf_path": pdf_path,
+                        "drug_name": drug_name,
+                        "drug_key": fold(drug_name),  # Sorgu filtresi için normalize ad
+                        # Normalize etkin maddeler, virgülle ayrılmış (Chroma metadata'sı liste almaz)
+                        "active_ingredient": ", ".join(result.get("active_ingredients") or []),
+                        "section": sections[j]  # prospectus_sections: KÜB/KT bölümü ('' = bilinmiyor)
+                    }
+                })
+            # Dosyanın tüm parçaları yazıldıktan sonra kontrol noktasına işlenir
+            records.append({"file_done": pdf_path})
+        return records
+    
+    def embed_stage(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Parça kayıtlarının vektörlerini (önbellek üzerinden) hesaplar."""
+        chunk_records = [record for record in records if "document" in record]
+        if chunk_records:
+            docs = [record["document"] for record in chunk_records]
+            try:
+                if embedding_cache is not None:
+                    embeddings = embedding_cache.embed(docs, sentence_transformer_ef)
+                else:
+                    embeddings = sentence_transformer_ef(docs)
+            except Exception as e:
+                logger.error(f"Embedding hesaplama hatasi: {e}")
+                embeddings = [None] * len(chunk_records)
+            for record, embedding in zip(chunk_records, embeddings):
+                record["embedding"] = embedding
+        return records
+    
+    def write_stage(records: List[Dict[str, Any]]) -> None:
+        """Kayıtları veritabanına yazar; hata olursa dosyaları yeniden denenecek olarak işaretler.
 
-    # Kalan son batch'i ekle
-    if batch_docs:
-        try:
-            collection.add(
-                documents=batch_docs,
-                ids=batch_ids,
-                metadatas=batch_metadatas
-            )
-            logger.info(f"Kalan {len(batch_docs)} parca veritabanina eklendi.")
-        except Exception as e:
-            logger.error(f"Veritabanina ekleme hatasi (son batch): {e}")
+        Parçaları eksiksiz yazılan PDF'ler batch'ten sonra kontrol noktasına eklenir.
+        """
+        for record in records:
+            if "delete_ids" in record:
+                collection.delete(ids=record["delete_ids"])
+        
+        chunk_records = [record for record in records if "document" in record]
+        failed_paths.update(record["path"] for record in chunk_records if record["embedding"] is None)
+        chunk_records = [record for record in chunk_records if record["embedding"] is not None]
+        if chunk_records:
+            try:
+                collection.upsert(
+                    documents=[record["document"] for record in chunk_records],
+                    embeddings=[record["embedding"] for record in chunk_records],
+                    ids=[record["id"] for record in chunk_records],
+                    metadatas=[record["metadata"] for record in chunk_records]
+                )
+                logger.info(f"{len(chunk_records)} parca veritabanina eklendi.")
+            except Exception as e:
+                logger.error(f"Veritabanina ekleme hatasi: {e}")
+                failed_paths.update(record["path"] for record in chunk_records)
+        
+        committed = {
+            record["file_done"]: manifest_files[record["file_done"]]
+            for record in records
+            if "file_done" in record and record["file_done"] not in failed_paths
+        }
+        if committed:
+            checkpoint.commit(committed)
+    
+    logger.info(
+        f"PDF isleme {workers} surec ile yapilacak "
+        f"(embedding batch={embed_batch_size}, encode batch={encode_batch_size}, "
+        f"uzunluga gore siralama={'acik' if sort_by_length else 'kapali'}, yazma batch={write_batch_size}, kuyruk={queue_size})."
+    )
+    pipeline = (
+        Pipeline(queue_size=queue_size)
+        .add_stage("parcala", chunk_stage)
+        .add_stage("embed", embed_stage, batch_size=embed_batch_size)
+        .add_stage("yazma", write_stage, batch_size=write_batch_size)
+    )
+    try:
+        stage_stats = pipeline.run(
+            iter_processed_pdfs(to_process, workers=workers, text_cache=text_cache),
+            source_name="okuma"
+        )
+    finally:
+        progress.close()
+        if text_cache is not None:
+            text_cache.save_index()
+    
+    # Yazılamayan dosyalar bir sonraki artımlı derlemede yeniden denensin
+    for pdf_path in failed_paths:
+        manifest_files[pdf_path]["sha256"] = None
+    
+    # Parça embedding raporu cümle indeksinden önce alınır; cümle kodlamaları aynı sayaçları artırır
+    if embedding_cache is not None:
+        logger.info(f"Embedding onbellegi: {embedding_cache.hits} isabet, {embedding_cache.misses} yeni kodlama")
+    logger.info(
+        f"Embedding hizi: {sentence_transformer_ef.encoded} parca {sentence_transformer_ef.encode_seconds:.2f}s'de kodlandi "
+        f"({sentence_transformer_ef.chunks_per_second:.1f} parca/s; embedding batch={embed_batch_size}, "
+        f"encode batch={encode_batch_size}, siralama={'acik' if sort_by_length else 'kapali'})"
+    )
+    
+    # İndeksler manifest'ten önce yazılır: API yeni build_id'yi gördüğünde indeksler de yenidir
+    build_ingredient_manifest(collection)
+    if lexical_index:
+        build_lexical_index(collection)
+    if sentence_index:
+        if embedding_cache is not None:
+            build_sentence_index(collection, lambda texts: embedding_cache.embed(texts, sentence_transformer_ef))
+        else:
+            build_sentence_index(collection, sentence_transformer_ef)
+    save_manifest(manifest_files)
+    checkpoint.remove()
+    logger.info(f"Manifest guncellendi: {MANIFEST_PATH}")
 
     end_time = time.time()
     duration = end_time - start_time
     
     logger.info("Veritabani olusturma tamamladi.")
-    logger.info(f"Toplam islenen PDF sayisi: {len(pdf_files)}")
+    logger.info(f"Toplam islenen PDF sayisi: {len(to_process)} (degismeyen: {len(pdf_files) - len(to_process)})")
     logger.info(f"Toplam olusturulan metin parcasi (chunk): {total_chunks}")
+    if text_cache is not None:
+        logger.info(f"Metin onbellegi: {text_cache_hits}/{len(to_process)} PDF onbellekten okundu")
+    for stats in stage_stats:
+        logger.info(f"Asama {stats.summary()}")
     logger.info(f"Islem suresi: {duration:.2f} saniye")
     
     return True
 
+def parse_args():
+    """Komut satırı argümanlarını okur."""
+    parser = argparse.ArgumentParser(description="İlaç prospektüsü vektör veritabanı oluşturucu")
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS,
+        help="PDF okuma ve parçalama için paralel süreç sayısı (1 = seri)"
+    )
+    parser.add_argument(
+        "--drug-list", default=None,
+        help=f"Satır başına bir ilaç adı içeren liste dosyası (varsayılan: {DRUG_LIST_PATH})"
+    )
+    parser.add_argument(
+        "--all-pdfs", action="store_true",
+        help="İlaç listesiyle eşleşmeyenler dahil tüm PDF'leri işle (tüm korpus)"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Manifest'e göre yalnızca eklenen/değişen/silinen PDF'leri güncelle"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Yarıda kalan derlemeye kontrol noktasından devam et (yazılmış PDF'ler atlanır)"
+    )
+    parser.add_argument(
+        "--no-text-cache", action="store_true",
+        help="Çıkarılmış metin önbelleğini kullanma, tüm PDF'leri yeniden ayrıştır"
+    )
+    parser.add_argument(
+        "--no-embedding-cache", action="store_true",
+        help="Embedding önbelleğini kullanma, tüm parçaları yeniden kodla"
+    )
+    parser.add_argument(
+        "--embed-batch-size", type=int, default=EMBED_BATCH_SIZE,
+        help="Embedding aşamasının batch boyutu (parça)"
+    )
+    parser.add_argument(
+        "--encode-batch-size", type=int, default=ENCODE_BATCH_SIZE,
+        help="Modelin tek ileri geçişte kodladığı parça sayısı"
+    )
+    parser.add_argument(
+        "--no-length-sort", action="store_true",
+        help="Parçaları kodlamadan önce uzunluğa göre sıralama"
+    )
+    parser.add_argument(
+        "--write-batch-size", type=int, default=WRITE_BATCH_SIZE,
+        help="Veritabanı yazma aşamasının batch boyutu (parça)"
+    )
+    parser.add_argument(
+        "--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+        help="Aşamalar arası kuyruk kapasitesi (batch)"
+    )
+    parser.add_argument(
+        "--no-lexical-index", action="store_true",
+        help=f"Derleme sonunda BM25 indeksini ({LEXICAL_INDEX_PATH}) oluşturma"
+    )
+    parser.add_argument(
+        "--no-sentence-index", action="store_true",
+        help=f"Derleme sonunda cümle düzeyi indeksi ({SENTENCE_INDEX_PATH}) oluşturma"
+    )
+    return parser.parse_args()
+
 if __name__ == '__main__':
-    create_database()
\ No newline at end of file
+    args = parse_args()
+    create_database(
+        workers=max(1, args.workers),
+        drug_list_path=args.drug_list,
+        all_pdfs=args.all_pdfs,
+        incremental=args.incremental,
+        resume=args.resume,
+        use_text_cache=not args.no_text_cache,
+        use_embedding_cache=not args.no_embedding_cache,
+        embed_batch_size=args.embed_batch_size,
+        encode_batch_size=args.encode_batch_size,
+        sort_by_length=not args.no_length_sort,
+        write_batch_size=args.write_batch_size,
+        queue_size=args.queue_size,
+        lexical_index=not args.no_lexical_index,
+        sentence_index=not args.no_sentence_index
+    )
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+İlaç Adı Eşleştirici
+Binlerce ilaç adını tek geçişte arayan Aho-Corasick tabanlı çoklu desen eşleştirici.
+Dosya adları ve sorgular, ilaç listesi uzunluğundan bağımsız olarak metin
+uzunluğuyla orantılı sürede taranır.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from turkish_text import fold
+
+
+def load_drug_list(path: str) -> List[str]:
+    """Her satırında bir ilaç adı bulunan listeyi okur ('#' ile başlayan satırlar yorumdur)."""
+    names = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            name = line.strip()
+            if name and not name.startswith("#"):
+                names.append(name)
+    return names
+
+
+class DrugMatcher:
+    """İlaç adlarını katlanmış (fold) biçimde arayan Aho-Corasick otomatı.
+
+    word_start=True ise yalnızca bir kelimenin başında başlayan eşleşmeler
+    sayılır (sorgular için); kelime sonu serbesttir, böylece "parolün" gibi
+    ekli biçimler de "PAROL" ile eşleşir. False ise dosya adlarında olduğu gibi
+    alt dize eşleşmesi yapılır.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, str]]] = [[]]  # (desen uzunluğu, kanonik ad)
+        self.names: List[str] = []
+
+        seen = set()
+        for name in names:
+            pattern = fold(name.strip())
+            if not pattern or pattern in seen:
+                continue
+            seen.add(pattern)
+            self.names.append(name.strip())
+            self._add(pattern, name.strip())
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_file(cls, path: str) -> "DrugMatcher":
+        return cls(load_drug_list(path))
+
+    def _add(self, pattern: str, name: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((len(pattern), name))
+
+    def _build(self):
+        """Genişlik öncelikli gezerek hata (fail) bağlantılarını kurar."""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def iter_matches(self, text: str, word_start: bool = False):
+        """Metindeki tüm eşleşmeleri (başlangıç, bitiş, kanonik ad) olarak üretir."""
+        folded = fold(text)
+        # fold() karakter sayısını korur, konumlar özgün metinle aynıdır
+        state = 0
+        for index, char in enumerate(folded):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, name in self._outputs[state]:
+                start, end = index - length + 1, index + 1
+                if word_start and start > 0 and folded[start - 1].isalnum():
+                    continue
+                yield start, end, name
+
+    def find_all(self, text: str, word_start: bool = False) -> List[str]:
+        """Metinde geçen ilaç adlarını ilk görülme sırasıyla, tekrarsız döndürür."""
+        found = []
+        for _, _, name in self.iter_matches(text, word_start):
+            if name not in found:
+                found.append(name)
+        return found
+
+    def best_match(self, text: str, word_start: bool = False) -> Optional[str]:
+        """En uzun eşleşen ilaç adını döndürür ("PAROL" yerine "PAROL PLUS" gibi)."""
+        best = None
+        for start, end, name in self.iter_matches(text, word_start):
+            if best is None or end - start > best[0]:
+                best = (end - start, name)
+        return best[1] if best else None
@@ -0,0 +1,126 @@
+"""
+Embedding Önbelleği
+Parça metinlerinin vektörlerini (model adı, metin özeti) anahtarıyla diskte saklar.
+Metni değişmeyen bir parça, koleksiyon yeniden oluşturulsa bile tekrar kodlanmaz.
+
+Disk düzeni (model başına bir klasör):
+    meta.json    -> {"model": ..., "dim": ...}
+    keys.bin     -> art arda 20 baytlık SHA-1 özetleri
+    vectors.f32  -> aynı sırada float32 vektör satırları
+
+Dosyalar yalnızca sona eklenerek büyür. Yazma yarıda kesilirse açılışta iki
+dosyanın ortak tam satır sayısına kırpılır.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KEY_SIZE = 20  # SHA-1 özet boyutu (bayt)
+VECTOR_DTYPE = np.float32
+
+
+def text_key(text: str) -> bytes:
+    """Parça metninin önbellek anahtarını döndürür."""
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Tek bir embedding modeli için diskte kalıcı vektör önbelleği."""
+
+    def __init__(self, cache_dir: str, model_name: str):
+        self.model_name = model_name
+        self.path = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        self.keys_path = os.path.join(self.path, "keys.bin")
+        self.vectors_path = os.path.join(self.path, "vectors.f32")
+        self.meta_path = os.path.join(self.path, "meta.json")
+        os.makedirs(self.path, exist_ok=True)
+
+        self.dim = None
+        self._index: Dict[bytes, int] = {}
+        self._vectors = None  # np.memmap, yeni satırlar eklendikçe yeniden açılır
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _load(self):
+        """Anahtar dizinini belleğe okur, yarım kalmış yazmaları kırpar."""
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model") != self.model_name:
+            logger.warning(f"Embedding onbellegi farkli modele ait, temizleniyor: {self.path}")
+            for path in (self.keys_path, self.vectors_path, self.meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return
+        self.dim = meta["dim"]
+
+        row_bytes = self.dim * np.dtype(VECTOR_DTYPE).itemsize
+        key_rows = os.path.getsize(self.keys_path) // KEY_SIZE if os.path.exists(self.keys_path) else 0
+        vector_rows = os.path.getsize(self.vectors_path) // row_bytes if os.path.exists(self.vectors_path) else 0
+        rows = min(key_rows, vector_rows)
+        if key_rows != rows or vector_rows != rows:
+            logger.warning(f"Embedding onbellegi {rows} satira kirpiliyor (yarim kalan yazma).")
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "r+b") as f:
+                f.truncate(rows * KEY_SIZE)
+        if os.path.exists(self.vectors_path):
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(rows * row_bytes)
+
+        if rows == 0:
+            return
+        with open(self.keys_path, "rb") as f:
+            data = f.read()
+        self._index = {data[i * KEY_SIZE:(i + 1) * KEY_SIZE]: i for i in range(rows)}
+        logger.info(f"Embedding onbellegi yuklendi: {rows} vektor ({self.path})")
+
+    def _rows(self, rows: Sequence[int]) -> np.ndarray:
+        """Verilen satırları okur; gerekirse memmap'i yeni boyutla yeniden açar."""
+        if self._vectors is None or max(rows) >= self._vectors.shape[0]:
+            self._vectors = np.memmap(self.vectors_path, dtype=VECTOR_DTYPE, mode="r", shape=(len(self._index), self.dim))
+        return np.asarray(self._vectors[list(rows)])
+
+    def _append(self, keys: List[bytes], vectors: np.ndarray):
+        """Yeni vektörleri dosyaların sonuna ekler (önce vektörler, sonra anahtarlar)."""
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_name, "dim": self.dim}, f)
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=VECTOR_DTYPE).tobytes())
+        with open(self.keys_path, "ab") as f:
+            f.write(b"".join(keys))
+        for key in keys:
+            self._index[key] = len(self._index)
+
+    def embed(self, texts: Sequence[str], encode: Callable[[List[str]], Sequence[Sequence[float]]]) -> List[List[float]]:
+        """Metinlerin vektörlerini döndürür; yalnızca önbellekte olmayanlar encode ile kodlanır."""
+        keys = [text_key(text) for text in texts]
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self._index and key not in missing:
+                missing[key] = text
+
+        if missing:
+            new_vectors = np.asarray(encode(list(missing.values())), dtype=VECTOR_DTYPE)
+            self._append(list(missing.keys()), new_vectors)
+
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        if not texts:
+            return []
+        return self._rows([self._index[key] for key in keys]).tolist()
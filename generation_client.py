@@ -0,0 +1,271 @@
+"""
+Asenkron Cevap Üretim İstemcisi
+OpenAI uyumlu /chat/completions uç noktası için bağlantı havuzlu (httpx.AsyncClient),
+istek başına süre sınırlı ve eşzamanlılığı semafor ile kısıtlanmış istemci.
+
+Bağlantı hataları ve geçici HTTP durumları (429, 5xx) süre sınırı içinde
+`retries` kez, artan beklemeyle yeniden denenir. Art arda hatalarda devre kesici açılır: açıkken üst servise istek gönderilmez,
+CircuitOpenError hemen döner ve çağıran kural tabanlı cevaba düşer. reset_seconds
+sonra tek bir deneme isteğine izin verilir; başarılı olursa devre kapanır.
+
+base_url ile aynı protokolü konuşan herhangi bir sunucu kullanılabilir
+(OpenAI, ollama'nın /v1 uç noktası ya da testlerde yerel sahte sunucu).
+Semafor ve istemci event loop içinde (FastAPI startup) oluşturulmalıdır.
+"""
+
+import abc
+import json
+import time
+import asyncio
+from typing import AsyncIterator, Callable, List, Optional
+
+import httpx
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class GenerationError(Exception):
+    """Üst servis hatası, zaman aşımı ya da beklenmeyen yanıt."""
+
+
+class CircuitOpenError(GenerationError):
+    """Devre açık; istek gönderilmedi."""
+
+
+class CircuitBreaker:
+    """failure_threshold ardışık hatada açılan, reset_seconds sonra deneme izni veren devre kesici.
+
+    Deneme isteği sonuç bildirmeden kaybolursa (ör. iptal) bir sonraki pencerede
+    yeni deneme yapılır; devre yarı açık durumda takılı kalmaz.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return "closed"
+        return "half_open" if self.clock() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        if self.failures < self.failure_threshold:
+            return True
+        now = self.clock()
+        if now - self.opened_at >= self.reset_seconds:
+            self.opened_at = now  # Bu pencerede tek deneme
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_seconds": self.reset_seconds,
+            "rejected": self.rejected
+        }
+
+
+class GenerationClient(abc.ABC):
+    """Cevap üretici arayüzü. llm_api yalnızca bu metotları kullanır; farklı bir
+    sağlayıcı ya da testler için yerine başka bir uygulama konabilir."""
+
+    @abc.abstractmethod
+    async def generate(self, messages: List[dict], timeout: Optional[float] = None) -> str:
+        """Tam cevap metni; hata, zaman aşımı ya da açık devrede GenerationError."""
+
+    @abc.abstractmethod
+    def stream(self, messages: List[dict], timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Cevap parçalarını geldikçe üreten asenkron iteratör."""
+
+    def fingerprint(self) -> str:
+        """Cevabı etkileyen ayarların özeti (üretilmiş cevap önbelleği anahtarına girer)."""
+        return type(self).__name__
+
+    async def aclose(self):
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+class OpenAICompatibleClient(GenerationClient):
+    """OpenAI uyumlu Chat Completions istemcisi (havuz + süre sınırı + semafor + devre kesici)."""
+
+    def __init__(self, base_url: str, api_key: Optional[str], model: str,
+                 max_tokens: int = 300, temperature: float = 0.7, timeout: float = 15.0,
+                 concurrency: int = 8, max_connections: int = 16, retries: int = 1,
+                 retry_backoff: float = 0.2, breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.retries = max(0, retries)
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_seconds=30.0)
+        self.in_flight = 0
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.retried = 0
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+    def _payload(self, messages: List[dict], stream: bool) -> dict:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _failed(self, error: Exception, timed_out: bool = False) -> GenerationError:
+        self.breaker.record_failure()
+        if timed_out:
+            self.timeouts += 1
+            return GenerationError("Cevap üretimi zaman aşımına uğradı")
+        self.errors += 1
+        return GenerationError(f"Cevap üretimi başarısız: {error}")
+
+    async def _retry_wait(self, error: httpx.HTTPError, attempt: int):
+        """Hata geçiciyse ve deneme hakkı kaldıysa bekler; değilse hatayı yeniden fırlatır."""
+        retryable = isinstance(error, httpx.TransportError) or (
+            isinstance(error, httpx.HTTPStatusError) and error.response.status_code in RETRY_STATUS_CODES
+        )
+        if not retryable or attempt >= self.retries:
+            raise error
+        self.retried += 1
+        await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def _complete(self, messages: List[dict]) -> str:
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                for attempt in range(self.retries + 1):
+                    try:
+                        response = await self._client.post("/chat/completions", json=self._payload(messages, stream=False))
+                        response.raise_for_status()
+                        break
+                    except httpx.HTTPError as e:
+                        await self._retry_wait(e, attempt)
+                content = response.json()["choices"][0]["message"]["content"]
+                if not content or not content.strip():
+                    raise ValueError("Üst servis boş cevap döndürdü")
+                return content.strip()
+            finally:
+                self.in_flight -= 1
+
+    async def generate(self, messages: List[dict], timeout: Optional[float] = None) -> str:
+        """Tam cevabı döndürür; semafor beklemesi dahil tüm süre timeout ile sınırlıdır."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Devre açık, cevap üretimi atlandı")
+        self.requests += 1
+        try:
+            text = await asyncio.wait_for(self._complete(messages), timeout or self.timeout)
+        except asyncio.TimeoutError as e:
+            raise self._failed(e, timed_out=True)
+        except (httpx.HTTPError, KeyError, IndexError, TypeError, ValueError) as e:
+            raise self._failed(e)
+        self.breaker.record_success()
+        return text
+
+    async def stream(self, messages: List[dict], timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Cevap parçalarını (SSE "data:" satırları) geldikçe üretir; toplam süre timeout ile sınırlıdır."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Devre açık, cevap üretimi atlandı")
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+
+        def remaining() -> float:
+            return max(deadline - loop.time(), 0.0)
+
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), remaining())
+        except asyncio.TimeoutError as e:
+            raise self._failed(e, timed_out=True)
+        self.in_flight += 1
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    request = self._client.build_request("POST", "/chat/completions", json=self._payload(messages, stream=True))
+                    response = await asyncio.wait_for(self._client.send(request, stream=True), remaining())
+                    if response.is_error:
+                        await response.aread()
+                        await response.aclose()
+                        response.raise_for_status()
+                    break
+                except httpx.HTTPError as e:
+                    await self._retry_wait(e, attempt)
+            try:
+                lines = response.aiter_lines()
+                while True:
+                    try:
+                        line = await asyncio.wait_for(lines.__anext__(), remaining())
+                    except StopAsyncIteration:
+                        break
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    text = (json.loads(data)["choices"][0].get("delta") or {}).get("content")
+                    if text:
+                        yield text
+            finally:
+                await response.aclose()
+        except asyncio.TimeoutError as e:
+            raise self._failed(e, timed_out=True)
+        except (httpx.HTTPError, KeyError, IndexError, TypeError, ValueError) as e:
+            raise self._failed(e)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+        self.breaker.record_success()
+
+    def fingerprint(self) -> str:
+        return f"{self.base_url}|{self.model}|{self.max_tokens}|{self.temperature}"
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "model": self.model,
+            "timeout_seconds": self.timeout,
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "retried": self.retried,
+            "circuit": self.breaker.stats()
+        }
@@ -0,0 +1,170 @@
+"""
+Aşamalı Veri Alım Hattı
+Veritabanı oluşturma adımlarını (PDF okuma -> parçalama -> embedding -> yazma)
+ayrı iş parçacıklarında, sınırlı kuyruklarla birbirine bağlayarak çalıştırır.
+
+Her aşama kendi toplu (batch) boyutuyla çalışır; kuyruklar dolduğunda önceki
+aşama bekler (backpressure). Böylece toplam süre aşamaların toplamına değil,
+en yavaş aşamanın süresine yaklaşır.
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 8  # Aşamalar arası kuyrukta bekleyen en fazla batch sayısı
+_POLL_SECONDS = 0.1
+_DONE = object()
+
+
+class StageStats:
+    """Bir aşamanın işlediği öğe sayısı ve çalışma süresi sayaçları."""
+
+    def __init__(self, name: str, batch_size: int):
+        self.name = name
+        self.batch_size = batch_size
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.busy_seconds = 0.0  # Yalnızca iş yapılan süre (kuyruk beklemesi hariç)
+        self.wall_seconds = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Meşgul olunan süre başına işlenen öğe sayısı."""
+        return self.items_in / self.busy_seconds if self.busy_seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.name:<8} girdi={self.items_in:<7} cikti={self.items_out:<7} batch={self.batches:<5} "
+            f"mesgul={self.busy_seconds:8.2f}s toplam={self.wall_seconds:8.2f}s hiz={self.throughput:9.1f}/s"
+        )
+
+
+class Pipeline:
+    """Kaynaktan gelen öğeleri sırayla tanımlanan aşamalardan geçirir.
+
+    Aşama fonksiyonu bir öğe listesi (batch) alır ve bir sonraki aşamaya
+    gönderilecek öğeleri liste olarak döndürür. Son aşamanın dönüşü yok sayılır.
+    Herhangi bir aşamada yakalanmamış hata olursa tüm hat durdurulur ve hata
+    run() çağrısında yeniden fırlatılır.
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._stages = []
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def add_stage(self, name: str, fn: Callable[[List[Any]], Optional[List[Any]]], batch_size: int = 1):
+        self._stages.append((name, fn, max(1, batch_size)))
+        return self
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while True:
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
+
+    def _fail(self, name: str, error: BaseException):
+        logger.error(f"Veri alim hatti '{name}' asamasinda durdu: {error}")
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _run_source(self, source: Iterable[Any], outbox: queue.Queue, stats: StageStats):
+        started = time.perf_counter()
+        iterator = iter(source)
+        try:
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                item = next(iterator, _DONE)
+                stats.busy_seconds += time.perf_counter() - t0
+                if item is _DONE:
+                    break
+                stats.items_in += 1
+                stats.items_out += 1
+                stats.batches += 1
+                if not self._put(outbox, [item]):
+                    break
+        except BaseException as e:
+            self._fail(stats.name, e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            self._put(outbox, _DONE)
+            stats.wall_seconds = time.perf_counter() - started
+
+    def _run_stage(self, fn, inbox: queue.Queue, outbox: Optional[queue.Queue], stats: StageStats):
+        started = time.perf_counter()
+        buffer: List[Any] = []
+
+        def process(batch: List[Any]):
+            t0 = time.perf_counter()
+            outputs = fn(batch) or []
+            stats.busy_seconds += time.perf_counter() - t0
+            stats.items_in += len(batch)
+            stats.items_out += len(outputs)
+            stats.batches += 1
+            if outbox is not None and outputs:
+                self._put(outbox, outputs)
+
+        try:
+            while True:
+                items = self._get(inbox)
+                if items is _DONE:
+                    break
+                buffer.extend(items)
+                while len(buffer) >= stats.batch_size:
+                    batch, buffer = buffer[:stats.batch_size], buffer[stats.batch_size:]
+                    process(batch)
+            if buffer and not self._stop.is_set():
+                process(buffer)
+        except BaseException as e:
+            self._fail(stats.name, e)
+        finally:
+            if outbox is not None:
+                self._put(outbox, _DONE)
+            stats.wall_seconds = time.perf_counter() - started
+
+    def run(self, source: Iterable[Any], source_name: str = "kaynak") -> List[StageStats]:
+        """Hattı çalıştırır, bitince aşama istatistiklerini döndürür."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self._stages]
+        all_stats = [StageStats(source_name, 1)]
+        threads = [threading.Thread(
+            target=self._run_source, args=(source, queues[0], all_stats[0]),
+            name=f"pipeline-{source_name}", daemon=True
+        )]
+        for index, (name, fn, batch_size) in enumerate(self._stages):
+            stats = StageStats(name, batch_size)
+            all_stats.append(stats)
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            threads.append(threading.Thread(
+                target=self._run_stage, args=(fn, queues[index], outbox, stats),
+                name=f"pipeline-{name}", daemon=True
+            ))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._error is not None:
+            raise self._error
+        return all_stats
@@ -0,0 +1,161 @@
+"""
+Niyet ve Anahtar Kelime Eşleştirici
+Kural tabanlı cevap motorunun niyet (sorgu) ve cümle (prospektüs parçası)
+anahtar kelime tabloları modül yüklenirken derlenmiş regex'lere çevrilir.
+Metin bir kez küçültülür ve tek findall ile taranır; eşleşen niyetler ve
+etiketlerin geçtiği cümleler aynı geçişte bulunur.
+
+Desenler anahtar kelimelerden kurulan bir önek ağacının (trie) regex
+karşılığıdır: "kaç" ve "kullanım" gibi aynı harfle başlayan kelimeler tek dalda
+birleşir, düz alternasyona göre her konumda denenen dal sayısı azalır. Cümle
+ayırıcısı da desene eklenir; böylece cümle sınırları ayrı bir bölme ve konum
+eşleme adımı gerektirmeden eşleşmelerle aynı sırada gelir.
+"""
+
+import re
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from turkish_text import turkish_lower
+
+# Sorgu niyetleri, kural motorundaki öncelik sırasıyla (ilk eşleşen cevabı belirler)
+QUERY_INTENTS: List[Tuple[str, List[str]]] = [
+    ('yan_etki', ['yan etki', 'istenmeyen etki', 'zararlı']),
+    ('doz', ['doz', 'miktar', 'kaç tane', 'ne kadar']),
+    ('kullanim', ['nasıl kullan', 'nasıl al', 'kullanım şekli']),
+    ('genel', ['nedir', 'ne için', 'hangi hastalık']),
+    ('kontrendikasyon', ['kimler kullanmamalı', 'kontrendikasyon', 'yasak']),
+    ('hamilelik', ['hamilelik', 'gebelik', 'emzirme']),
+]
+
+# Her niyet için parçadaki ilgili cümleleri işaretleyen anahtar kelimeler
+SENTENCE_KEYWORDS: Dict[str, List[str]] = {
+    'yan_etki': ['yan etki', 'istenmeyen etki', 'reaksiyon', 'zararlı etki'],
+    'doz': ['doz', 'miktar', 'günde', 'tablet', 'mg', 'ml', 'kaç'],
+    'kullanim': ['kullanım', 'alınır', 'nasıl', 'şekli', 'yöntemi'],
+    'genel': ['etken madde', 'içerik', 'nedir', 'tedavi', 'hastalık'],
+    'kontrendikasyon': ['kullanmamalı', 'yasak', 'sakıncalı', 'kontrendikasyon'],
+    'hamilelik': ['hamilelik', 'gebelik', 'emzirme', 'anne'],
+}
+
+
+def trie_pattern(keywords: Sequence[str]) -> str:
+    """Anahtar kelimelerden önek ağacı biçiminde regex üretir (her konumda en uzun eşleşme)."""
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}  # Kelime sonu
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Kelime burada bitebiliyorsa devamı isteğe bağlıdır; açgözlü ? en uzununu seçer
+        return f"(?:{body})?" if '' in node else body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """Etiketli anahtar kelime gruplarını derlenmiş regex'lerle arayan alt dize eşleştirici.
+
+    Sonuçlar her anahtar kelimeyi ayrı ayrı `in` ile aramakla aynıdır:
+    - Tüm etiketler: desen her konumda sıfır genişlikli bakış (lookahead) dener,
+      iç içe ve örtüşen kelimelerin hepsi bulunur. Aynı konumda yalnızca en uzun
+      kelime döndüğü için her kelime, içinde geçen diğer kelimelerin
+      etiketlerini de taşır ("zararlı etki" -> "zararlı").
+    - Tek etiket: örtüşmeyen, daha hızlı desen yeterlidir; atlanan bir kelime
+      aynı etiketli bir eşleşmenin içinde, dolayısıyla aynı cümlede başlar.
+    """
+
+    def __init__(self, groups: Sequence[Tuple[str, Sequence[str]]], separator: Optional[str] = None):
+        keywords_by_label: Dict[str, List[str]] = {}
+        keyword_labels: Dict[str, set] = {}
+        for label, keywords in groups:
+            for keyword in keywords:
+                keyword = turkish_lower(keyword)
+                keywords_by_label.setdefault(label, []).append(keyword)
+                keyword_labels.setdefault(keyword, set()).add(label)
+
+        self.labels: List[str] = list(keywords_by_label)
+        self.separator = separator
+        self._labels_by_keyword: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset().union(*(
+                labels for other, labels in keyword_labels.items() if other in keyword
+            ))
+            for keyword in keyword_labels
+        }
+
+        tokens = [separator] if separator else []
+        self._pattern = re.compile(f"(?=({trie_pattern(list(keyword_labels) + tokens)}))")
+        self._label_patterns = {
+            label: re.compile(trie_pattern(keywords + tokens))
+            for label, keywords in keywords_by_label.items()
+        }
+
+    def labels_in(self, text: str) -> FrozenSet[str]:
+        """Metinde geçen tüm etiketler."""
+        found = self._pattern.findall(turkish_lower(text))
+        return frozenset().union(*(self._labels_by_keyword.get(keyword, ()) for keyword in found))
+
+    def segment_hits(self, text: str, label: Optional[str] = None) -> Dict[str, List[int]]:
+        """text.split(separator) parçalarından hangilerinde her etiketin geçtiğini döndürür.
+
+        label verilirse yalnızca o etiket aranır (örtüşmeyen hızlı desen).
+        """
+        lowered = turkish_lower(text)
+        separator = self.separator
+        index = 0
+        if label is not None:
+            pattern = self._label_patterns.get(label)
+            indices: List[int] = []
+            for token in (pattern.findall(lowered) if pattern else ()):
+                if token == separator:
+                    index += 1
+                elif not indices or indices[-1] != index:
+                    indices.append(index)
+            return {label: indices} if indices else {}
+
+        hits: Dict[str, List[int]] = {}
+        for token in self._pattern.findall(lowered):
+            if token == separator:
+                index += 1
+                continue
+            for matched in self._labels_by_keyword[token]:
+                indices = hits.setdefault(matched, [])
+                if not indices or indices[-1] != index:
+                    indices.append(index)
+        return hits
+
+
+class IntentMatcher:
+    """Sorgu niyetlerini ve parça içi cümle eşleşmelerini derlenmiş desenlerle bulur."""
+
+    def __init__(self, query_intents: Sequence[Tuple[str, Sequence[str]]] = QUERY_INTENTS,
+                 sentence_keywords: Optional[Dict[str, Sequence[str]]] = None,
+                 separator: str = '.'):
+        self.separator = separator
+        self.query_matcher = KeywordMatcher(query_intents)
+        self.sentence_matcher = KeywordMatcher(
+            list((sentence_keywords or SENTENCE_KEYWORDS).items()), separator=separator
+        )
+
+    def detect(self, query: str) -> List[str]:
+        """Sorguda eşleşen tüm niyetler, öncelik sırasıyla."""
+        found = self.query_matcher.labels_in(query)
+        return [intent for intent in self.query_matcher.labels if intent in found]
+
+    def primary(self, query: str) -> Optional[str]:
+        """Önceliği en yüksek niyet (yoksa None)."""
+        intents = self.detect(query)
+        return intents[0] if intents else None
+
+    def sentence_hits(self, text: str, info_type: Optional[str] = None) -> Tuple[List[str], Dict[str, List[int]]]:
+        """Metni cümlelere böler; her etiket için anahtar kelimesi geçen cümle sıralarını döndürür.
+
+        Cümleler text.split('.') ile aynıdır. info_type verilirse yalnızca o
+        etiketin cümleleri aranır (kural motorunun istek başına yolu).
+        """
+        return text.split(self.separator), self.sentence_matcher.segment_hits(text, info_type)
@@ -0,0 +1,241 @@
+"""
+Sözcüksel (BM25) Arama İndeksi
+Koleksiyondaki parçalar için Türkçe'ye uygun ters indeks. build_database.py
+derlemenin sonunda koleksiyondan kurar ve tek bir sıkıştırılmış .npz dosyasına
+yazar; API bu dosyayı yükleyip vektör aramasıyla birlikte kullanır.
+
+Belirteçleme: Türkçe küçük harf + ASCII katlama (fold), harf/rakam dizileri,
+durak kelimeleri atılır ve kelimeler ilk STEM_LENGTH karakterine kesilir
+(Türkçe'nin eklemeli yapısı için basit ve etkili bir gövdeleme:
+"parasetamolün", "parasetamolü", "parasetamol" -> "paras").
+
+Disk düzeni (.npz):
+    vocab        -> terimler (terim kimliği = dizideki sıra)
+    indptr       -> terim başına posting aralığı (CSR)
+    doc_indices  -> posting'lerin belge sıraları
+    term_freqs   -> posting'lerin terim frekansları
+    doc_lengths  -> belge başına terim sayısı
+    doc_ids      -> belge sırasından Chroma parça kimliğine
+    groups       -> grup adları (ör. drug_key; aramayı tek ilaçla sınırlamak için)
+    doc_groups   -> belge başına grup sırası (-1 = grupsuz)
+    sections     -> prospektüs bölüm adları (ör. yan_etki; niyete göre filtre için)
+    doc_sections -> belge başına bölüm sırası (-1 = bölümsüz)
+"""
+
+import os
+import re
+from array import array
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from turkish_text import fold
+
+STEM_LENGTH = 5
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Kısa sorgunun "yalnızca ad araması" sayılması için: en fazla bu kadar terim,
+# her terim belgelerin en fazla bu oranında geçmeli (ilaç/etken madde adları nadirdir)
+NAME_LOOKUP_MAX_TERMS = 2
+NAME_LOOKUP_MAX_DF_RATIO = 0.01
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(fold(word) for word in """
+    ve veya ile ya da de da ki mi mı mu mü bu şu o bir için gibi kadar daha çok en
+    ne neden nedir nasıl hangi kim kimler midir mıdır var yok olan olarak ise her
+    sonra önce ama fakat ancak eğer yani hem
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Metni katlanmış, gövdelenmiş terimlere böler (durak kelimeleri atılır)."""
+    terms = []
+    for token in _TOKEN_RE.findall(fold(text)):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token if token.isdigit() else token[:STEM_LENGTH])
+    return terms
+
+
+class BM25Index:
+    """CSR biçiminde posting listeleri tutan, numpy ile puanlayan BM25 indeksi."""
+
+    def __init__(self, vocab: List[str], indptr: np.ndarray, doc_indices: np.ndarray,
+                 term_freqs: np.ndarray, doc_lengths: np.ndarray, doc_ids: List[str],
+                 groups: Optional[List[str]] = None, doc_groups: Optional[np.ndarray] = None,
+                 sections: Optional[List[str]] = None, doc_sections: Optional[np.ndarray] = None,
+                 k1: float = BM25_K1, b: float = BM25_B):
+        self.vocab = {term: term_id for term_id, term in enumerate(vocab)}
+        self.groups = {group: group_id for group_id, group in enumerate(groups or [])}
+        self.doc_groups = doc_groups if doc_groups is not None else np.full(len(doc_ids), -1, dtype=np.int32)
+        self.sections = {section: section_id for section_id, section in enumerate(sections or [])}
+        self.doc_sections = doc_sections if doc_sections is not None else np.full(len(doc_ids), -1, dtype=np.int32)
+        self.indptr = indptr
+        self.doc_indices = doc_indices
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.doc_ids = doc_ids
+        self.k1 = k1
+        self.b = b
+
+        n_docs = len(doc_ids)
+        doc_freqs = np.diff(indptr).astype(np.float32)
+        self.doc_freqs = doc_freqs
+        self.idf = np.log1p((n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        avg_length = float(doc_lengths.mean()) if n_docs else 0.0
+        # Puanlamada belge başına sabit olan payda kısmı önceden hesaplanır
+        self.doc_norm = (k1 * (1 - b + b * doc_lengths / max(avg_length, 1e-9))).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(cls, documents: Iterable[Sequence]) -> "BM25Index":
+        """(parça kimliği, metin[, grup[, bölüm]]) kayıtlarından indeksi kurar."""
+        vocab = {}
+        groups = {}
+        sections = {}
+        doc_ids = []
+        doc_groups = array("i")
+        doc_sections = array("i")
+        doc_lengths = array("i")
+        posting_terms = array("i")
+        posting_docs = array("i")
+        posting_freqs = array("i")
+
+        for doc_index, (doc_id, text, *labels) in enumerate(documents):
+            terms = tokenize(text or "")
+            doc_ids.append(doc_id)
+            group = labels[0] if labels else None
+            section = labels[1] if len(labels) > 1 else None
+            doc_groups.append(groups.setdefault(group, len(groups)) if group else -1)
+            doc_sections.append(sections.setdefault(section, len(sections)) if section else -1)
+            doc_lengths.append(len(terms))
+            for term, freq in Counter(terms).items():
+                term_id = vocab.setdefault(term, len(vocab))
+                posting_terms.append(term_id)
+                posting_docs.append(doc_index)
+                posting_freqs.append(freq)
+
+        terms = np.frombuffer(posting_terms, dtype=np.int32)
+        order = np.argsort(terms, kind="stable")  # Terim içinde belge sırası korunur
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(vocab)), out=indptr[1:])
+        return cls(
+            vocab=list(vocab),
+            indptr=indptr,
+            doc_indices=np.frombuffer(posting_docs, dtype=np.int32)[order],
+            term_freqs=np.minimum(np.frombuffer(posting_freqs, dtype=np.int32)[order], 65535).astype(np.uint16),
+            doc_lengths=np.frombuffer(doc_lengths, dtype=np.int32).astype(np.float32),
+            doc_ids=doc_ids,
+            groups=list(groups),
+            doc_groups=np.frombuffer(doc_groups, dtype=np.int32).copy(),
+            sections=list(sections),
+            doc_sections=np.frombuffer(doc_sections, dtype=np.int32).copy()
+        )
+
+    def save(self, path: str):
+        vocab = [None] * len(self.vocab)
+        for term, term_id in self.vocab.items():
+            vocab[term_id] = term
+        groups = [None] * len(self.groups)
+        for group, group_id in self.groups.items():
+            groups[group_id] = group
+        sections = [None] * len(self.sections)
+        for section, section_id in self.sections.items():
+            sections[section_id] = section
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            vocab=np.array(vocab, dtype=str),
+            indptr=self.indptr,
+            doc_indices=self.doc_indices,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths,
+            doc_ids=np.array(self.doc_ids, dtype=str),
+            groups=np.array(groups, dtype=str),
+            doc_groups=self.doc_groups,
+            sections=np.array(sections, dtype=str),
+            doc_sections=self.doc_sections,
+            params=np.array([self.k1, self.b], dtype=np.float32)
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            k1, b = (float(value) for value in data["params"])
+            return cls(
+                vocab=data["vocab"].tolist(),
+                indptr=data["indptr"],
+                doc_indices=data["doc_indices"],
+                term_freqs=data["term_freqs"],
+                doc_lengths=data["doc_lengths"],
+                doc_ids=data["doc_ids"].tolist(),
+                groups=data["groups"].tolist() if "groups" in data else None,
+                doc_groups=data["doc_groups"] if "doc_groups" in data else None,
+                sections=data["sections"].tolist() if "sections" in data else None,
+                doc_sections=data["doc_sections"] if "doc_sections" in data else None,
+                k1=k1,
+                b=b
+            )
+
+    def _term_ids(self, query: str) -> List[int]:
+        term_ids = []
+        for term in tokenize(query):
+            term_id = self.vocab.get(term)
+            if term_id is not None and term_id not in term_ids:
+                term_ids.append(term_id)
+        return term_ids
+
+    def search(self, query: str, top_k: int, groups: Optional[Sequence[str]] = None,
+               sections: Optional[Sequence[str]] = None) -> List[Tuple[str, float]]:
+        """BM25 puanına göre en iyi top_k (parça kimliği, puan) çiftini döndürür.
+
+        groups verilirse yalnızca bu gruplardaki (ör. aynı ilaca ait), sections
+        verilirse yalnızca bu bölümlerdeki belgeler puanlanır.
+        """
+        term_ids = self._term_ids(query)
+        if not term_ids or top_k <= 0:
+            return []
+        group_ids = None
+        if groups is not None:
+            group_ids = [self.groups[group] for group in groups if group in self.groups]
+            if not group_ids:
+                return []
+        section_ids = None
+        if sections is not None:
+            section_ids = [self.sections[section] for section in sections if section in self.sections]
+            if not section_ids:
+                return []
+
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            docs = self.doc_indices[start:end]
+            freqs = self.term_freqs[start:end].astype(np.float32)
+            scores[docs] += self.idf[term_id] * freqs * (self.k1 + 1) / (freqs + self.doc_norm[docs])
+        if group_ids is not None:
+            scores[~np.isin(self.doc_groups, group_ids)] = 0
+        if section_ids is not None:
+            scores[~np.isin(self.doc_sections, section_ids)] = 0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.doc_ids[i], float(scores[i])) for i in candidates]
+
+    def is_name_lookup(self, query: str) -> bool:
+        """Sorgu yalnızca nadir terimlerden (ilaç/etken madde adı gibi) mi oluşuyor?"""
+        terms = tokenize(query)
+        if not terms or len(terms) > NAME_LOOKUP_MAX_TERMS:
+            return False
+        max_df = max(1.0, NAME_LOOKUP_MAX_DF_RATIO * len(self.doc_ids))
+        for term in terms:
+            term_id = self.vocab.get(term)
+            if term_id is None or self.doc_freqs[term_id] > max_df:
+                return False
+        return True
@@ -7,18 +7,33 @@ Combines vector search with Hugging Face Gemma-2B
 import os
 import json
 import time
+import secrets
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 from pathlib import Path
 
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+import numpy as np
 import uvicorn
 
+from drug_matcher import DrugMatcher
+from intent_matcher import IntentMatcher
+from lexical_index import BM25Index
+from prospectus_sections import INTENT_SECTIONS
+from query_batcher import MicroBatcher
+from search_cache import FileBackedValue, ResponseCache, TTLCache
+from sentence_index import SentenceIndex
+from turkish_text import fold, turkish_lower
+
 # Try importing Hugging Face transformers (optional for demo)
 try:
     # Import only if needed, disabled for demo speed
@@ -30,9 +45,9 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logger.warning("� Using rule-based responses")
 
-# Try importing OpenAI (fallback)
+# OpenAI-compatible generation over pooled async HTTP (optional: needs httpx)
 try:
-    import openai
+    from generation_client import CircuitBreaker, CircuitOpenError, GenerationError, OpenAICompatibleClient
     HAS_OPENAI = True
 except ImportError:
     HAS_OPENAI = False
@@ -41,18 +56,118 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Vector database configuration (build_database.py ile aynı olmalı)
+DB_PATH = "./data/veritabani_optimized"
+COLLECTION_NAME = "ilac_prospektusleri"
+EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
+MANIFEST_PATH = f"{DB_PATH}_manifest.json"  # build_id her derlemede değişir
+LEXICAL_INDEX_PATH = f"{DB_PATH}_bm25.npz"  # build_database.py'nin kurduğu BM25 indeksi
+SENTENCE_INDEX_PATH = f"{DB_PATH}_sentences.npz"  # build_database.py'nin kurduğu cümle indeksi
+
+# Extractive answers: best sentences across the top-k chunks (sentence index required)
+EXTRACTIVE_SENTENCES = int(os.getenv("EXTRACTIVE_SENTENCES", "2"))
+
+# Hybrid retrieval: BM25 + vector search merged with reciprocal-rank fusion
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") != "0"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "30"))  # Her yöntemden alınan aday sayısı
+RRF_K = 60
+
+# Queries naming a known drug search only that drug's chunks (where drug_key = ...)
+DRUG_MANIFEST_PATH = "./data/ilac_dosya_manifest.json"  # build_database.py: ilaç -> PDF'ler
+INGREDIENT_MANIFEST_PATH = "./data/etken_madde_manifest.json"  # build_database.py: etkin madde -> drug_key'ler
+DRUG_FILTER = os.getenv("DRUG_FILTER", "1") != "0"
+# Intent queries ("yan etki", "hamilelik") search only the matching prospectus sections (where section = ...)
+SECTION_FILTER = os.getenv("SECTION_FILTER", "1") != "0"
+
+# Answer generation (OpenAI-compatible /chat/completions). OPENAI_BASE_URL can point to
+# any compatible server, e.g. ollama (http://localhost:11434/v1) or a local fake for tests
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+GENERATION_TIMEOUT = float(os.getenv("GENERATION_TIMEOUT", "15"))  # İstek başına toplam süre (s)
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "8"))  # Aynı anda üst servise giden istek
+GENERATION_MAX_CONNECTIONS = int(os.getenv("GENERATION_MAX_CONNECTIONS", "16"))
+GENERATION_RETRIES = int(os.getenv("GENERATION_RETRIES", "1"))  # Bağlantı hatası / 429 / 5xx'te yeniden deneme
+GENERATION_BREAKER_FAILURES = int(os.getenv("GENERATION_BREAKER_FAILURES", "5"))  # Devreyi açan ardışık hata
+GENERATION_BREAKER_RESET = float(os.getenv("GENERATION_BREAKER_RESET", "30"))  # Deneme öncesi bekleme (s)
+
+# Query embedding cache: normalized query -> embedding
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+QUERY_EMBEDDING_CACHE_TTL = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+
+# Full SearchResponse cache, invalidated when the collection is rebuilt
+# RESPONSE_CACHE_DB set -> shared SQLite backend (e.g. across uvicorn workers)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB") or None
+
+# Generated-answer cache: (query intent, chunk ids in the prompt, generator/prompt
+# version) -> LLMResponse, so paraphrases that retrieve the same chunks reuse the
+# answer. Persisted in SQLite across restarts (ANSWER_CACHE_DB= -> memory only);
+# the file is opened in the startup handler, importing the module writes nothing
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "4096"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 3600)))
+ANSWER_CACHE_DB = os.getenv("ANSWER_CACHE_DB", "data/answer_cache.sqlite3") or None
+PROMPT_VERSION = "1"  # build_openai_messages değişince artırılır; eski cevaplar kullanılmaz
+PROMPT_CONTEXT_RESULTS = 3  # Prompt'a giren ilk sonuç sayısı
+
+# Search execution: worker threads for embedding + Chroma queries and the
+# maximum number of searches in flight (the rest wait on the semaphore)
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "4"))
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", str(SEARCH_WORKERS)))
+
+# Opt-in micro-batching: concurrent /search requests arriving within the
+# window (or until SEARCH_BATCH_MAX queue up) share one embed + collection.query
+SEARCH_BATCH_WINDOW_MS = float(os.getenv("SEARCH_BATCH_WINDOW_MS", "0"))  # 0 = kapalı
+SEARCH_BATCH_MAX = int(os.getenv("SEARCH_BATCH_MAX", "16"))
+
+# Startup warm-up: load the embedding model and run these queries through the
+# search path before /ready reports 200 (WARMUP_ON_STARTUP=0 -> lazy loading)
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") != "0"
+WARMUP_QUERIES = [
+    "parol yan etkileri",
+    "aspirin günlük doz",
+    "hamilelikte ilaç kullanımı"
+]
+
+# Pagination: the first /search page retrieves limit * SEARCH_CANDIDATE_MULTIPLIER
+# candidates and the following pages are served from memory via next_cursor
+# (SEARCH_CURSOR_TTL s); a cursor running past them retrieves deeper, up to
+# SEARCH_CANDIDATE_DEPTH candidates in total
+SEARCH_CANDIDATE_MULTIPLIER = int(os.getenv("SEARCH_CANDIDATE_MULTIPLIER", "3"))
+SEARCH_CANDIDATE_DEPTH = int(os.getenv("SEARCH_CANDIDATE_DEPTH", "100"))
+SEARCH_CURSOR_CACHE_SIZE = int(os.getenv("SEARCH_CURSOR_CACHE_SIZE", "512"))
+SEARCH_CURSOR_TTL = float(os.getenv("SEARCH_CURSOR_TTL", "300"))
+
+# /search/batch: maximum number of queries accepted in one request
+BATCH_SEARCH_MAX_QUERIES = int(os.getenv("BATCH_SEARCH_MAX_QUERIES", "64"))
+
 # Global variables
 chroma_client = None
 collection = None
+embedding_function = None
+query_embedding_cache = TTLCache(QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_TTL)
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)  # SQLite startup'ta açılır
+answer_cache = ResponseCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL)
+candidate_cache = TTLCache(SEARCH_CURSOR_CACHE_SIZE, SEARCH_CURSOR_TTL)  # cursor token -> adaylar (bkz. store_candidates)
+intent_matcher = IntentMatcher()  # Kural tabanlı cevap için derlenmiş niyet/anahtar kelime tabloları
+_collection_version = (None, None)  # (dosya imzası, sürüm)
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+search_semaphore = None  # startup'ta event loop içinde oluşturulur
+search_batcher = None  # SEARCH_BATCH_WINDOW_MS > 0 ise startup'ta oluşturulur
+readiness = {"ready": False, "status": "starting", "warmup_ms": None, "error": None}
+warmup_task = None
+lexical_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bm25")
 llm_model = None
 llm_tokenizer = None
 llm_pipeline = None
+generation_client = None  # GenerationClient; startup'ta event loop içinde oluşturulur (testlerde değiştirilebilir)
 
 class SearchRequest(BaseModel):
     query: str
     limit: int = 10
     minimum_similarity: float = 0.0
     use_llm: bool = True
+    cursor: Optional[str] = None  # Önceki yanıtın next_cursor'ı: sonraki sayfa
 
 class SearchResult(BaseModel):
     document_id: str
@@ -75,6 +190,18 @@ class SearchResponse(BaseModel):
     total_results: int
     success: bool
     message: str
+    next_cursor: Optional[str] = None
+
+class BatchSearchRequest(BaseModel):
+    requests: List[SearchRequest]
+
+class BatchSearchResponse(BaseModel):
+    responses: List[SearchResponse]
+    cached_queries: int
+    retrieval_time_ms: int
+    total_time_ms: int
+    success: bool
+    message: str
 
 class HealthResponse(BaseModel):
     status: str
@@ -83,6 +210,11 @@ class HealthResponse(BaseModel):
     llm_status: str
     api_version: str
     timestamp: str
+    query_embedding_cache: Optional[dict] = None
+    response_cache: Optional[dict] = None
+    answer_cache: Optional[dict] = None
+    search_batching: Optional[dict] = None
+    generation: Optional[dict] = None
 
 # FastAPI app initialization
 app = FastAPI(
@@ -110,23 +242,33 @@ def initialize_llm():
     return True
 
 def initialize_openai_fallback():
-    """Initialize OpenAI as fallback if Hugging Face fails"""
-    global HAS_OPENAI
+    """Create the pooled OpenAI-compatible generation client (must run inside the event loop)"""
+    global HAS_OPENAI, generation_client
     
     if not HAS_OPENAI:
         return False
+    if generation_client is not None:  # Dışarıdan verilmiş istemci (ör. test)
+        return True
         
-    # Try to get API key from environment
+    # Try to get API key from environment (yerel uyumlu sunucular anahtarsız çalışabilir)
     api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
+    if not api_key and not os.getenv('OPENAI_BASE_URL'):
         logger.warning("🤖 OpenAI API key not found - LLM disabled")
         HAS_OPENAI = False
         return False
     
     try:
-        openai.api_key = api_key
-        # Test API with a simple call
-        logger.info("🤖 OpenAI LLM initialized successfully")
+        generation_client = OpenAICompatibleClient(
+            base_url=OPENAI_BASE_URL,
+            api_key=api_key,
+            model=OPENAI_MODEL,
+            timeout=GENERATION_TIMEOUT,
+            concurrency=GENERATION_CONCURRENCY,
+            max_connections=GENERATION_MAX_CONNECTIONS,
+            retries=GENERATION_RETRIES,
+            breaker=CircuitBreaker(GENERATION_BREAKER_FAILURES, GENERATION_BREAKER_RESET)
+        )
+        logger.info(f"🤖 OpenAI LLM initialized successfully ({OPENAI_BASE_URL}, {OPENAI_MODEL})")
         return True
     except Exception as e:
         logger.error(f"🤖 LLM initialization failed: {e}")
@@ -150,23 +292,16 @@ def enhanced_rule_based_response(query: str, search_results: List[dict]) -> Opti
     
     top_result = search_results[0]
     text_chunk = top_result.get('text_chunk', '')
-    drug_name = top_result.get('metadata', {}).get('drug_name', 'Bu ilaç')
-    
-    query_lower = query.lower()
-    
-    # Advanced pattern matching for Turkish medical queries
-    if any(word in query_lower for word in ['yan etki', 'istenmeyen etki', 'zararlı']):
-        answer = extract_medical_info(text_chunk, 'yan_etki', drug_name)
-    elif any(word in query_lower for word in ['doz', 'miktar', 'kaç tane', 'ne kadar']):
-        answer = extract_medical_info(text_chunk, 'doz', drug_name)
-    elif any(word in query_lower for word in ['nasıl kullan', 'nasıl al', 'kullanım şekli']):
-        answer = extract_medical_info(text_chunk, 'kullanim', drug_name)
-    elif any(word in query_lower for word in ['nedir', 'ne için', 'hangi hastalık']):
-        answer = extract_medical_info(text_chunk, 'genel', drug_name)
-    elif any(word in query_lower for word in ['kimler kullanmamalı', 'kontrendikasyon', 'yasak']):
-        answer = extract_medical_info(text_chunk, 'kontrendikasyon', drug_name)
-    elif any(word in query_lower for word in ['hamilelik', 'gebelik', 'emzirme']):
-        answer = extract_medical_info(text_chunk, 'hamilelik', drug_name)
+    drug_name = top_result.get('metadata', {}).get('drug_name') or 'Bu ilaç'
+    
+    # Cümle indeksi varsa ilk k sonucun cümleleri vektör benzerliğiyle seçilir;
+    # yoksa niyet tablosu tek derlenmiş regex ile taranır (öncelik sırası korunur)
+    sentences = extract_best_sentences(query, search_results)
+    intent = None if sentences else intent_matcher.primary(query)
+    if sentences:
+        answer = f"{drug_name} - {' '.join(sentences)}"
+    elif intent:
+        answer = extract_medical_info(text_chunk, intent, drug_name)
     else:
         # General information
         answer = f"{drug_name} hakkında bilgi: {text_chunk[:200]}..."
@@ -177,23 +312,21 @@ def enhanced_rule_based_response(query: str, search_results: List[dict]) -> Opti
         sources_used=len(search_results)
     )
 
+def extract_best_sentences(query: str, search_results: List[dict]) -> List[str]:
+    """Sentences most similar to the query across all result chunks, in reading order"""
+    index = sentence_index_file.get()
+    if index is None or EXTRACTIVE_SENTENCES <= 0:
+        return []
+    chunk_ids = [result.get('document_id') for result in search_results]
+    # Sorgu vektörü arama aşamasında hesaplandığı için önbellekten gelir
+    query_embedding = embed_queries([query])[0]
+    return [sentence for sentence, _, _ in index.best_sentences(query_embedding, chunk_ids, EXTRACTIVE_SENTENCES)]
+
 def extract_medical_info(text: str, info_type: str, drug_name: str) -> str:
     """Extract specific medical information from text"""
-    sentences = text.split('.')
-    
-    keywords = {
-        'yan_etki': ['yan etki', 'istenmeyen etki', 'reaksiyon', 'zararlı etki'],
-        'doz': ['doz', 'miktar', 'günde', 'tablet', 'mg', 'ml', 'kaç'],
-        'kullanim': ['kullanım', 'alınır', 'nasıl', 'şekli', 'yöntemi'],
-        'genel': ['etken madde', 'içerik', 'nedir', 'tedavi', 'hastalık'],
-        'kontrendikasyon': ['kullanmamalı', 'yasak', 'sakıncalı', 'kontrendikasyon'],
-        'hamilelik': ['hamilelik', 'gebelik', 'emzirme', 'anne']
-    }
-    
-    relevant_sentences = []
-    for sentence in sentences:
-        if any(keyword in sentence.lower() for keyword in keywords.get(info_type, [])):
-            relevant_sentences.append(sentence.strip())
+    # Parça tek findall ile taranır; cümle sınırları eşleşmelerle birlikte gelir
+    sentences, hits = intent_matcher.sentence_hits(text, info_type)
+    relevant_sentences = [sentences[i].strip() for i in hits.get(info_type, [])]
     
     if relevant_sentences:
         result = '. '.join(relevant_sentences[:2])
@@ -206,21 +339,17 @@ def extract_medical_info(text: str, info_type: str, drug_name: str) -> str:
         else:
             return f"{drug_name} hakkında bilgi prospektüs içeriğinde mevcuttur."
 
-def generate_openai_response(query: str, search_results: List[dict]) -> Optional[LLMResponse]:
-    """Generate response using OpenAI as fallback"""
-    if not HAS_OPENAI or not search_results:
-        return None
+def build_openai_messages(query: str, search_results: List[dict]) -> List[dict]:
+    """Chat messages for the pharmacist prompt built from the top results"""
+    # Prepare context from search results
+    context = "İlaç bilgileri:\n"
+    for i, result in enumerate(search_results[:PROMPT_CONTEXT_RESULTS]):
+        drug_name = result.get('metadata', {}).get('drug_name') or 'Bilinmeyen'
+        text = result.get('text_chunk', '')[:200]  # Limit text length
+        context += f"{i+1}. {drug_name}: {text}...\n"
     
-    try:
-        # Prepare context from search results
-        context = "İlaç bilgileri:\n"
-        for i, result in enumerate(search_results[:3]):  # Use top 3 results
-            drug_name = result.get('metadata', {}).get('drug_name', 'Bilinmeyen')
-            text = result.get('text_chunk', '')[:200]  # Limit text length
-            context += f"{i+1}. {drug_name}: {text}...\n"
-        
-        # Create prompt
-        prompt = f"""Sen bir uzman eczacısın. Aşağıdaki soruya göre ilaç bilgilerini kullanarak yardımcı ol:
+    # Create prompt
+    prompt = f"""Sen bir uzman eczacısın. Aşağıdaki soruya göre ilaç bilgilerini kullanarak yardımcı ol:
 
 Soru: {query}
 
@@ -235,29 +364,253 @@ Lütfen:
 5. Türkçe ve anlaşılır bir dil kullan
 
 Cevap:"""
+    
+    return [
+        {"role": "system", "content": "Sen uzman bir eczacısın ve ilaç konularında güvenilir bilgi veriyorsun."},
+        {"role": "user", "content": prompt}
+    ]
 
-        # Call OpenAI API
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Sen uzman bir eczacısın ve ilaç konularında güvenilir bilgi veriyorsun."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300,
-            temperature=0.7
-        )
-        
-        llm_answer = response.choices[0].message.content.strip()
-        
-        return LLMResponse(
+async def rule_based_answer(query: str, search_results: List[dict]) -> Optional[LLMResponse]:
+    """enhanced_rule_based_response on the search executor (may embed the query)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(search_executor, enhanced_rule_based_response, query, search_results)
+
+def answer_cache_key(query: str, search_results: List[dict]) -> tuple:
+    """Generated-answer cache key: (intent, question, prompt chunk ids in order, generator/prompt version).
+    
+    Paraphrases share an answer only through a detected intent; without one the
+    question is free-form, so the normalized query text is part of the key.
+    """
+    intent = intent_matcher.primary(query)
+    question = normalize_query(query) if intent is None else None
+    chunk_ids = tuple(result.get('document_id') for result in search_results[:PROMPT_CONTEXT_RESULTS])
+    generator = f"{generation_client.fingerprint()}|prompt-{PROMPT_VERSION}"
+    return (intent, question, chunk_ids, generator)
+
+async def stream_openai_response(query: str, search_results: List[dict],
+                                 outcome: Optional[dict] = None) -> AsyncIterator[str]:
+    """Yield answer tokens as they arrive; if generation fails before the first token
+    the rule-based answer is sent instead and outcome["generated"] is set to False"""
+    cache_key = answer_cache_key(query, search_results)
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        yield cached["llm_answer"]
+        return
+    
+    parts = []
+    try:
+        async for text in generation_client.stream(build_openai_messages(query, search_results), GENERATION_TIMEOUT):
+            parts.append(text)
+            yield text
+        answer_cache.put(cache_key, LLMResponse(
+            llm_answer="".join(parts).strip(),
+            confidence="medium",
+            sources_used=len(search_results[:PROMPT_CONTEXT_RESULTS])
+        ).model_dump())
+    except GenerationError as e:
+        if parts:
+            raise
+        logger.warning(f"🤖 LLM streaming unavailable, rule-based fallback: {e}")
+        if outcome is not None:
+            outcome["generated"] = False
+        fallback = await rule_based_answer(query, search_results)
+        if fallback is not None:
+            yield fallback.llm_answer
+
+async def generate_openai_response(query: str, search_results: List[dict]) -> Tuple[Optional[LLMResponse], bool]:
+    """Generate response with the async generation client.
+    
+    Returns (response, generated): on timeout, upstream error or open circuit the
+    rule-based answer is returned with generated=False (not worth caching).
+    """
+    if generation_client is None or not search_results:
+        return None, False
+    
+    # Aynı niyet + aynı prompt parçaları: başka ifadeyle sorulmuş soru, cevap yeniden üretilmez
+    cache_key = answer_cache_key(query, search_results)
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        return LLMResponse(**cached), True
+    
+    try:
+        llm_answer = await generation_client.generate(build_openai_messages(query, search_results), GENERATION_TIMEOUT)
+        response = LLMResponse(
             llm_answer=llm_answer,
             confidence="medium",
-            sources_used=len(search_results[:3])
+            sources_used=len(search_results[:PROMPT_CONTEXT_RESULTS])
         )
-        
+        answer_cache.put(cache_key, response.model_dump())
+        return response, True
+    except CircuitOpenError as e:
+        logger.warning(f"🤖 {e} - rule-based fallback")
+    except GenerationError as e:
+        logger.error(f"🤖 LLM response generation failed: {e} - rule-based fallback")
+    return await rule_based_answer(query, search_results), False
+
+def get_embedding_function():
+    """Load the sentence-transformers embedding function on first use"""
+    global embedding_function
+    
+    if embedding_function is None:
+        logger.info(f"🧮 Embedding modeli yükleniyor: {EMBEDDING_MODEL}")
+        embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+            model_name=EMBEDDING_MODEL,
+            device="cpu"
+        )
+    return embedding_function
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for caching: Turkish lowercase, collapsed whitespace"""
+    return " ".join(turkish_lower(query).split())
+
+def embed_queries(queries: List[str]) -> List[List[float]]:
+    """Embed queries through the LRU cache; only cache misses hit the model"""
+    normalized = [normalize_query(query) for query in queries]
+    embeddings = [query_embedding_cache.get(query) for query in normalized]
+    
+    missing = sorted({query for query, embedding in zip(normalized, embeddings) if embedding is None})
+    if missing:
+        vectors = dict(zip(missing, get_embedding_function()(missing)))
+        for query, vector in vectors.items():
+            query_embedding_cache.put(query, vector)
+        embeddings = [embedding if embedding is not None else vectors[query]
+                      for query, embedding in zip(normalized, embeddings)]
+    return embeddings
+
+def get_collection_version() -> str:
+    """Return the build_id of the current collection (re-read only when the manifest changes)"""
+    global _collection_version
+    
+    # Manifest yoksa (eski derleme) Chroma'nın sqlite dosyasının değişimi sürüm sayılır
+    for path in (MANIFEST_PATH, os.path.join(DB_PATH, "chroma.sqlite3")):
+        try:
+            stat = os.stat(path)
+            break
+        except OSError:
+            continue
+    else:
+        return "unknown"
+    
+    signature = (path, stat.st_mtime_ns, stat.st_size)
+    if _collection_version[0] != signature:
+        version = f"{stat.st_mtime_ns}-{stat.st_size}"
+        if path == MANIFEST_PATH:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    version = json.load(f).get("build_id") or version
+            except (OSError, ValueError):
+                pass
+        _collection_version = (signature, version)
+    return _collection_version[1]
+
+def load_lexical_index(path: str) -> BM25Index:
+    """FileBackedValue loader for the BM25 index written by build_database.py"""
+    try:
+        index = BM25Index.load(path)
+    except Exception as e:
+        logger.error(f"❌ BM25 indeksi yüklenemedi: {e}")
+        raise
+    logger.info(f"📚 BM25 indeksi yüklendi: {len(index):,} parça, {len(index.vocab):,} terim")
+    return index
+
+def load_sentence_index(path: str) -> SentenceIndex:
+    """FileBackedValue loader for the sentence-level index written by build_database.py"""
+    try:
+        index = SentenceIndex.load(path)
     except Exception as e:
-        logger.error(f"🤖 LLM response generation failed: {e}")
+        logger.error(f"❌ Cümle indeksi yüklenemedi: {e}")
+        raise
+    logger.info(f"🧾 Cümle indeksi yüklendi: {len(index.chunk_ids):,} parça, {len(index):,} cümle")
+    return index
+
+def load_drug_names(path: str) -> DrugMatcher:
+    """FileBackedValue loader: drug names that have PDFs in the collection"""
+    with open(path, 'r', encoding='utf-8') as f:
+        matcher = DrugMatcher(json.load(f))
+    logger.info(f"💊 İlaç adı eşleştirici yüklendi: {len(matcher):,} ilaç")
+    return matcher
+
+# Dosyalar değiştiğinde (yeni derleme) yeniden yüklenir
+lexical_index_file = FileBackedValue(LEXICAL_INDEX_PATH, load_lexical_index)
+def load_ingredients(path: str) -> Tuple[DrugMatcher, dict]:
+    """FileBackedValue loader: active ingredient matcher and ingredient -> drug_keys"""
+    with open(path, 'r', encoding='utf-8') as f:
+        drugs_by_ingredient = json.load(f)
+    logger.info(f"💊 Etkin madde eşleştirici yüklendi: {len(drugs_by_ingredient):,} etkin madde")
+    return DrugMatcher(drugs_by_ingredient), drugs_by_ingredient
+
+drug_matcher_file = FileBackedValue(DRUG_MANIFEST_PATH, load_drug_names)
+ingredient_matcher_file = FileBackedValue(INGREDIENT_MANIFEST_PATH, load_ingredients)
+sentence_index_file = FileBackedValue(SENTENCE_INDEX_PATH, load_sentence_index)
+
+def get_lexical_index() -> Optional[BM25Index]:
+    """Return the BM25 index (None -> vector-only search)"""
+    return lexical_index_file.get() if HYBRID_SEARCH else None
+
+def drug_keys_in(query: str, reload: bool = True) -> List[str]:
+    """drug_keys of the drug named in the query, else of the drugs containing the named active ingredient.
+    
+    reload=False uses the matchers already in memory (no os.stat, no file reads).
+    """
+    matcher = drug_matcher_file.get() if reload else drug_matcher_file.current()
+    if matcher is not None:
+        # Kelime başında eşleşme: "parolün" -> PAROL, ama "aparol" eşleşmez
+        drug_name = matcher.best_match(query, word_start=True)
+        if drug_name:
+            return [fold(drug_name)]
+    ingredients = ingredient_matcher_file.get() if reload else ingredient_matcher_file.current()
+    if ingredients is not None:
+        ingredient_matcher, drugs_by_ingredient = ingredients
+        ingredient = ingredient_matcher.best_match(query, word_start=True)
+        if ingredient:
+            return drugs_by_ingredient[ingredient]
+    return []
+
+def search_filter(query: str, reload: bool = True) -> Optional[dict]:
+    """Chroma where filter restricting the search to the drug (or the drugs of the
+    active ingredient) named in the query and to the prospectus sections matching
+    the query intent (reload=False: in-memory matchers only, see drug_keys_in)"""
+    conditions = []
+    drug_keys = drug_keys_in(query, reload) if DRUG_FILTER else []
+    if drug_keys:
+        conditions.append({"drug_key": drug_keys[0] if len(drug_keys) == 1 else {"$in": drug_keys}})
+    if SECTION_FILTER:
+        sections = INTENT_SECTIONS.get(intent_matcher.primary(query))
+        if sections:
+            conditions.append({"section": sections[0] if len(sections) == 1 else {"$in": sections}})
+    
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+def filter_conditions(where: Optional[dict]) -> List[dict]:
+    """Single-field conditions of a where filter built by search_filter"""
+    if not where:
+        return []
+    return where.get("$and", [where])
+
+def relax_filter(where: Optional[dict]) -> Optional[dict]:
+    """Drop the last condition (section first, then drug) for the no-candidates retry"""
+    conditions = filter_conditions(where)[:-1]
+    if not conditions:
         return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+def lexical_scope(where: Optional[dict]) -> Tuple[Optional[List[str]], Optional[List[str]]]:
+    """(drug_key groups, sections) of a where filter for BM25Index.search"""
+    groups, sections = None, None
+    for condition in filter_conditions(where):
+        if "drug_key" in condition:
+            value = condition["drug_key"]
+            groups = value["$in"] if isinstance(value, dict) else [value]
+        if "section" in condition:
+            value = condition["section"]
+            sections = value["$in"] if isinstance(value, dict) else [value]
+    return groups, sections
+
+def filter_key(where: Optional[dict]) -> str:
+    """Hashable key grouping requests that can share one filtered collection.query"""
+    return json.dumps(where, sort_keys=True) if where else ""
 
 def initialize_database():
     """ChromaDB connection initialize et"""
@@ -268,14 +621,13 @@ def initialize_database():
         
         # ChromaDB client - yeni veritabanı yolu
         chroma_client = chromadb.PersistentClient(
-            path="./data/veritabani_optimized",
+            path=DB_PATH,
             settings=Settings(allow_reset=True)
         )
         
         # Collection bağlantısı - yeni collection adı
-        collection_name = "ilac_prospektusleri"
         try:
-            collection = chroma_client.get_collection(collection_name)
+            collection = chroma_client.get_collection(COLLECTION_NAME)
             doc_count = collection.count()
             logger.info(f"✅ Collection bulundu: {doc_count:,} documents")
         except Exception as e:
@@ -288,30 +640,93 @@ def initialize_database():
         logger.error(f"❌ Database initialization hatası: {e}")
         return False
 
+def load_query_filters():
+    """Load the drug / active ingredient matchers so search_filter(reload=False) has them"""
+    drug_matcher_file.get()
+    ingredient_matcher_file.get()
+
+def warm_up() -> int:
+    """Pay the cold-start cost up front: model load, HNSW index, BM25 index, drug matcher"""
+    started = time.time()
+    get_embedding_function()(WARMUP_QUERIES[:1])
+    logger.info(f"🧮 Embedding modeli yüklendi ({time.time() - started:.1f}s)")
+    retrieve_batch([SearchRequest(query=query, use_llm=False) for query in WARMUP_QUERIES])
+    return int((time.time() - started) * 1000)
+
+async def run_warmup():
+    """Background warm-up; /ready turns 200 when it finishes"""
+    readiness["status"] = "warming_up"
+    try:
+        loop = asyncio.get_running_loop()
+        readiness["warmup_ms"] = await loop.run_in_executor(search_executor, warm_up)
+    except Exception as e:
+        logger.error(f"❌ Warm-up hatası: {e}")
+        readiness.update(status="warmup_failed", error=str(e))
+        return
+    readiness.update(ready=True, status="ready")
+    logger.info(f"🔥 Warm-up tamamlandı: {readiness['warmup_ms']} ms")
+
 @app.on_event("startup")
 async def startup_event():
     """API başlangıç işlemleri"""
+    global search_semaphore, search_batcher, warmup_task
     logger.info("🚀 AI-Powered ProspektAsistan API başlatılıyor...")
+    search_semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+    if SEARCH_BATCH_WINDOW_MS > 0:
+        search_batcher = MicroBatcher(run_retrieval_batch, SEARCH_BATCH_WINDOW_MS, SEARCH_BATCH_MAX)
+        logger.info(f"📦 Mikro-batching aktif: {SEARCH_BATCH_WINDOW_MS} ms / en fazla {SEARCH_BATCH_MAX} sorgu")
+    
+    # Kalıcı önbellekler: açılamazsa bellekte çalışmaya devam edilir
+    for cache, sqlite_path in ((response_cache, RESPONSE_CACHE_DB), (answer_cache, ANSWER_CACHE_DB)):
+        if sqlite_path:
+            try:
+                cache.open(sqlite_path)
+                logger.info(f"💾 Önbellek dosyası: {sqlite_path}")
+            except Exception as e:
+                logger.error(f"❌ Önbellek dosyası açılamadı {sqlite_path}: {e}")
+    
+    # İlaç / etkin madde eşleştiricileri event loop dışında yüklenir (mikro-batch anahtarı bunları kullanır)
+    await asyncio.get_running_loop().run_in_executor(search_executor, load_query_filters)
     
     # Initialize database
     db_success = initialize_database()
     if not db_success:
         logger.error("❌ Database initialization başarısız!")
+        readiness.update(status="database_unavailable", error="Database initialization başarısız")
         return
     
     # Try to initialize rule-based AI system
     llm_success = initialize_llm()
     if llm_success:
         logger.info("🤖 Rule-based AI sistemi aktif")
+    # OpenAI uyumlu üretici yapılandırılmışsa cevapları o üretir; hata, zaman aşımı
+    # ya da açık devrede kural tabanlı cevaba düşülür
+    openai_success = initialize_openai_fallback()
+    if openai_success:
+        logger.info("🤖 OpenAI LLM fallback aktif")
+    elif not llm_success:
+        logger.info("🔍 Sadece vector search aktif")
+    
+    # Model ve indeksler arka planda ısıtılır; bu sırada /health yanıt verir, /ready 503 döner
+    if WARMUP_ON_STARTUP:
+        warmup_task = asyncio.create_task(run_warmup())
     else:
-        # Fallback to OpenAI
-        openai_success = initialize_openai_fallback()
-        if openai_success:
-            logger.info("🤖 OpenAI LLM fallback aktif")
-        else:
-            logger.info("🔍 Sadece vector search aktif")
+        readiness.update(ready=True, status="ready")
     
-    logger.info("✅ API başarıyla başlatıldı!")
+    logger.info(f"✅ API başarıyla başlatıldı! (search workers: {SEARCH_WORKERS}, eşzamanlı arama: {SEARCH_CONCURRENCY})")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """API kapanış işlemleri"""
+    if generation_client is not None:
+        await generation_client.aclose()
+    search_executor.shutdown(wait=False)
+    lexical_executor.shutdown(wait=False)
+
+@app.get("/ready")
+async def readiness_check():
+    """Load balancer hazırlık kontrolü: warm-up bitene kadar 503"""
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -321,10 +736,10 @@ async def health_check():
         
         # Determine LLM status
         llm_status = "unavailable"
-        if HAS_TRANSFORMERS:
-            llm_status = "rule-based-ai"
-        elif HAS_OPENAI:
+        if generation_client is not None:
             llm_status = "openai"
+        elif HAS_TRANSFORMERS:
+            llm_status = "rule-based-ai"
         
         return HealthResponse(
             status="healthy",
@@ -332,7 +747,12 @@ async def health_check():
             total_documents=doc_count,
             llm_status=llm_status,
             api_version="2.0.0",
-            timestamp=datetime.now().isoformat()
+            timestamp=datetime.now().isoformat(),
+            query_embedding_cache=query_embedding_cache.stats(),
+            response_cache=response_cache.stats(),
+            answer_cache=answer_cache.stats(),
+            search_batching=search_batcher.stats() if search_batcher else None,
+            generation=generation_client.stats() if generation_client is not None else None
         )
         
     except Exception as e:
@@ -346,6 +766,432 @@ async def health_check():
             timestamp=datetime.now().isoformat()
         )
 
+def search_cache_key(request: SearchRequest, paginate: bool = True) -> tuple:
+    """Response cache key: the normalized query plus every parameter that changes the answer.
+    
+    /search/batch retrieves without pagination (no next_cursor, total_results <= limit),
+    so its responses are kept apart from /search's.
+    """
+    return (normalize_query(request.query), request.limit,
+            request.minimum_similarity, request.use_llm, paginate)
+
+def get_cached_response(cache_key: tuple, request: SearchRequest,
+                        start_time: float) -> Optional[SearchResponse]:
+    """Return the cached SearchResponse for this request, or None.
+    
+    The entry carries the candidates behind next_cursor; if this process
+    no longer has (or never had, e.g. another worker via SQLite) the cursor, the
+    candidates are registered again under the same token so later pages work.
+    """
+    cached = response_cache.get(cache_key)
+    if cached is None:
+        return None
+    cached = dict(cached)
+    candidates = cached.pop("candidates", None)
+    next_cursor = cached.get("next_cursor")
+    if next_cursor:
+        token = next_cursor.rsplit(":", 1)[0]
+        if candidate_cache.get(token) is None:
+            if not isinstance(candidates, dict):
+                return None  # Adaysız (ya da eski biçimli) kayıt: cursor çalışmaz, yeniden aranır
+            candidate_cache.put(token, dict(
+                candidates, results=[SearchResult(**candidate) for candidate in candidates["results"]]
+            ))
+    response = SearchResponse(**cached)
+    response.query = request.query
+    response.search_time_ms = int((time.time() - start_time) * 1000)
+    return response
+
+def cache_search_response(cache_key: tuple, request: SearchRequest, response: SearchResponse,
+                          formatted_results: List[SearchResult]):
+    """Store the response with the candidates behind its next_cursor (see get_cached_response)"""
+    entry = response.model_dump()
+    if response.next_cursor:
+        candidates = candidate_entry(request, formatted_results)
+        entry["candidates"] = dict(candidates, results=[result.model_dump() for result in formatted_results])
+    response_cache.put(cache_key, entry)
+
+def distance_to_similarity(distance: float) -> float:
+    """Map a Chroma cosine distance to the similarity score reported to clients"""
+    # Better similarity calculation
+    return max(0, 1 - (distance / 2))  # Normalize distance better
+
+def format_results(request: SearchRequest, documents: List[str], metadatas: List[dict],
+                   similarities: List[float], ids: List[str]) -> List[SearchResult]:
+    """Convert one query's ranked chunks into SearchResults above the similarity threshold"""
+    formatted_results = []
+    for i, (doc, metadata, similarity, doc_id) in enumerate(zip(documents, metadatas, similarities, ids)):
+        if similarity >= request.minimum_similarity:
+            result = SearchResult(
+                document_id=doc_id,
+                document_name=f"Document_{i+1}",
+                document_type=metadata.get('document_type', 'KUB'),
+                text_chunk=doc.strip()[:300] + "..." if len(doc) > 300 else doc.strip(),
+                similarity_score=round(similarity, 3),
+                metadata=metadata
+            )
+            formatted_results.append(result)
+    return formatted_results
+
+async def generate_answer(request: SearchRequest,
+                          formatted_results: List[SearchResult]) -> Tuple[Optional[LLMResponse], bool]:
+    """Answer step of /search: (response, cacheable); never blocks the event loop"""
+    page_results = formatted_results[:request.limit]  # Cevap yalnızca ilk sayfadan üretilir
+    if not request.use_llm or not page_results:
+        return None, True
+    search_results = [r.dict() for r in page_results]
+    # Try Hugging Face first, then OpenAI fallback
+    if HAS_TRANSFORMERS and llm_pipeline:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(search_executor, generate_llm_response, request.query, search_results), True
+    if generation_client is not None:
+        return await generate_openai_response(request.query, search_results)
+    return None, True
+
+async def build_search_response(request: SearchRequest, formatted_results: List[SearchResult],
+                                start_time: float, paginate: bool = True) -> Tuple[SearchResponse, bool]:
+    """Generate the answer (if requested) and assemble the SearchResponse; (response, cacheable)"""
+    llm_response, cacheable = await generate_answer(request, formatted_results)
+    return make_search_response(request, formatted_results, llm_response, start_time, paginate), cacheable
+
+def make_search_response(request: SearchRequest, formatted_results: List[SearchResult],
+                         llm_response: Optional[LLMResponse], start_time: float,
+                         paginate: bool = True) -> SearchResponse:
+    """First page of formatted_results; the remaining candidates are kept behind next_cursor"""
+    search_time = time.time() - start_time
+    
+    return SearchResponse(
+        query=request.query,
+        results=formatted_results[:request.limit],
+        llm_response=llm_response,
+        search_time_ms=int(search_time * 1000),
+        total_results=len(formatted_results),
+        success=True,
+        message=f"{len(formatted_results)} sonuç bulundu" + (" + AI analizi" if llm_response else ""),
+        next_cursor=store_candidates(request, formatted_results) if paginate else None
+    )
+
+def candidate_depth(request: SearchRequest, paginate: bool = True) -> int:
+    """Candidates retrieved for a first page: a few pages' worth with pagination, one page without"""
+    pages = SEARCH_CANDIDATE_MULTIPLIER if paginate else 1
+    return max(1, min(request.limit * pages, SEARCH_CANDIDATE_DEPTH))
+
+def store_candidates(request: SearchRequest, formatted_results: List[SearchResult]) -> Optional[str]:
+    """Keep the ranked candidates in memory and return a cursor for the next page.
+    
+    The entry also records what is needed to retrieve deeper later: the query,
+    minimum_similarity, the depth retrieved so far and whether it came back short
+    (exhausted: no deeper retrieval can find more).
+    """
+    candidates = candidate_entry(request, formatted_results)
+    if request.limit <= 0 or (len(formatted_results) <= request.limit and candidates["exhausted"]):
+        return None
+    token = secrets.token_urlsafe(12)
+    candidate_cache.put(token, candidates)
+    return f"{token}:{request.limit}"
+
+def candidate_entry(request: SearchRequest, formatted_results: List[SearchResult]) -> dict:
+    depth = candidate_depth(request)
+    return {
+        "query": request.query,
+        "minimum_similarity": request.minimum_similarity,
+        "depth": depth,
+        "exhausted": len(formatted_results) < depth or depth >= SEARCH_CANDIDATE_DEPTH,
+        "results": formatted_results
+    }
+
+async def extend_candidates(token: str, candidates: dict, end: int) -> dict:
+    """Retrieve deeper when a cursor runs past the cached candidates.
+    
+    Already cached candidates keep their order (pages served so far stay valid);
+    new ones from the deeper ranking are appended after them.
+    """
+    depth = min(end * SEARCH_CANDIDATE_MULTIPLIER, SEARCH_CANDIDATE_DEPTH)
+    deeper_request = SearchRequest(query=candidates["query"], limit=end, use_llm=False,
+                                   minimum_similarity=candidates["minimum_similarity"])
+    async with search_semaphore:
+        loop = asyncio.get_running_loop()
+        deeper = (await loop.run_in_executor(
+            search_executor, lambda: retrieve_batch([deeper_request], depths=[depth])
+        ))[0]
+    seen = {result.document_id for result in candidates["results"]}
+    candidates = dict(
+        candidates,
+        depth=depth,
+        exhausted=len(deeper) < depth or depth >= SEARCH_CANDIDATE_DEPTH,
+        results=candidates["results"] + [result for result in deeper if result.document_id not in seen]
+    )
+    candidate_cache.put(token, candidates)
+    return candidates
+
+async def cursor_page(request: SearchRequest, start_time: float) -> SearchResponse:
+    """Serve the page at request.cursor from the candidate cache (no embedding or ANN
+    search unless the page runs past the cached candidates)"""
+    try:
+        token, offset = request.cursor.rsplit(":", 1)
+        offset = int(offset)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz cursor")
+    candidates = candidate_cache.get(token)
+    if candidates is None or offset < 0:
+        raise HTTPException(status_code=410, detail="Cursor süresi dolmuş; aramayı yeniden başlatın")
+    
+    end = offset + max(request.limit, 1)
+    if end > len(candidates["results"]) and not candidates["exhausted"]:
+        candidates = await extend_candidates(token, candidates, end)
+    formatted_results = candidates["results"]
+    has_more = end < len(formatted_results) or not candidates["exhausted"]
+    return SearchResponse(
+        query=request.query,
+        results=formatted_results[offset:end],
+        llm_response=None,
+        search_time_ms=int((time.time() - start_time) * 1000),
+        total_results=len(formatted_results),
+        success=True,
+        message=f"{len(formatted_results)} sonuç bulundu ({offset + 1}-{min(end, len(formatted_results))})",
+        next_cursor=f"{token}:{end}" if has_more else None
+    )
+
+async def single_token(text: str) -> AsyncIterator[str]:
+    yield text
+
+async def stream_answer(request: SearchRequest,
+                        formatted_results: List[SearchResult],
+                        outcome: Optional[dict] = None) -> Optional[Tuple[AsyncIterator[str], str, int]]:
+    """Streaming counterpart of generate_answer.
+    
+    Returns (async token iterator, confidence, sources_used) or None when no answer is generated.
+    A rule-based fallback sets outcome["generated"] to False once the iterator is consumed.
+    """
+    if not request.use_llm or not formatted_results:
+        return None
+    search_results = [r.dict() for r in formatted_results[:request.limit]]
+    if HAS_TRANSFORMERS and llm_pipeline:
+        loop = asyncio.get_running_loop()
+        llm_response = await loop.run_in_executor(search_executor, generate_llm_response, request.query, search_results)
+        if llm_response is None:
+            return None
+        return single_token(llm_response.llm_answer), llm_response.confidence, llm_response.sources_used
+    if generation_client is not None:
+        return stream_openai_response(request.query, search_results, outcome), "medium", len(search_results[:PROMPT_CONTEXT_RESULTS])
+    return None
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[str]:
+    """Merge ranked id lists: score(id) = sum of 1 / (k + rank) over the lists it appears in"""
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+def fetch_chunks(ids: List[str], include_embeddings: bool = False) -> dict:
+    """Fetch chunks by id: {id: (document, metadata[, embedding])}"""
+    if not ids:
+        return {}
+    include = ['documents', 'metadatas'] + (['embeddings'] if include_embeddings else [])
+    fetched = collection.get(ids=ids, include=include)
+    columns = [fetched['documents'], fetched['metadatas']]
+    if include_embeddings:
+        columns.append(fetched['embeddings'])
+    return {chunk_id: values for chunk_id, *values in zip(fetched['ids'], *columns)}
+
+def cosine_similarity(query_embedding: List[float], chunk_embedding: List[float]) -> float:
+    """Similarity score for a chunk that the vector query did not return (its own vector vs. the query)"""
+    query_vector = np.asarray(query_embedding, dtype=np.float32)
+    chunk_vector = np.asarray(chunk_embedding, dtype=np.float32)
+    cosine = float(query_vector @ chunk_vector /
+                   max(np.linalg.norm(query_vector) * np.linalg.norm(chunk_vector), 1e-12))
+    return distance_to_similarity(1 - cosine)
+
+def lexical_lookup(request: SearchRequest, lexical_index: BM25Index, n_results: int,
+                   where: Optional[dict] = None) -> Optional[List[SearchResult]]:
+    """Name-lookup fast path: rank by BM25 only, no ANN search and no query encode.
+    
+    If the query embedding is already cached, or minimum_similarity > 0 needs it,
+    similarity_score is the same cosine-based score as in the fused path (chunk
+    vectors fetched with the hits). Otherwise similarity_score is the BM25 score
+    relative to the best hit (1.0 for the top result, 0-1 scale).
+    """
+    groups, sections = lexical_scope(where)
+    hits = lexical_index.search(request.query, n_results, groups=groups, sections=sections)
+    query_embedding = query_embedding_cache.get(normalize_query(request.query))
+    if query_embedding is None and request.minimum_similarity > 0:
+        query_embedding = embed_queries([request.query])[0]
+    
+    chunks = fetch_chunks([chunk_id for chunk_id, _ in hits], include_embeddings=query_embedding is not None)
+    order = [chunk_id for chunk_id, _ in hits if chunk_id in chunks]
+    if not order:
+        return None  # Vektör aramasına düşülür
+    
+    if query_embedding is not None:
+        similarities = [cosine_similarity(query_embedding, chunks[chunk_id][2]) for chunk_id in order]
+    else:
+        bm25_scores = dict(hits)
+        best = max(bm25_scores[order[0]], 1e-12)
+        similarities = [bm25_scores[chunk_id] / best for chunk_id in order]
+    return format_results(
+        request,
+        [chunks[chunk_id][0] for chunk_id in order],
+        [chunks[chunk_id][1] for chunk_id in order],
+        similarities,
+        order
+    )
+
+def vector_query(query_embeddings: List[List[float]], n_results: int, where: Optional[dict]) -> dict:
+    """collection.query, falling back to an exact search over the filtered chunks.
+    
+    With a selective where filter and a large n_results hnswlib can fail to fill
+    the result matrix ("contiguous 2D array"); one drug's chunks are few enough
+    to rank exactly with numpy instead.
+    """
+    try:
+        return collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=['documents', 'metadatas', 'distances']
+        )
+    except RuntimeError as e:
+        if where is None:
+            raise
+        logger.warning(f"⚠️ Filtreli HNSW sorgusu başarısız, tam arama yapılıyor ({where}): {e}")
+    
+    fetched = collection.get(where=where, include=['documents', 'metadatas', 'embeddings'])
+    results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+    if not fetched['ids']:
+        return {key: [[] for _ in query_embeddings] for key in results}
+    
+    matrix = np.asarray(fetched['embeddings'], dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    queries = np.asarray(query_embeddings, dtype=np.float32)
+    queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    distances = 1 - queries @ matrix.T
+    for row in distances:
+        order = np.argsort(row, kind="stable")[:n_results]
+        results['ids'].append([fetched['ids'][k] for k in order])
+        results['documents'].append([fetched['documents'][k] for k in order])
+        results['metadatas'].append([fetched['metadatas'][k] for k in order])
+        results['distances'].append([float(row[k]) for k in order])
+    return results
+
+def retrieve_group(requests: List[SearchRequest], positions: List[int], where: Optional[dict],
+                   n_results: List[int], lexical_index: Optional[BM25Index],
+                   all_results: List[Optional[List[SearchResult]]]) -> List[int]:
+    """Hybrid retrieval for requests sharing one where filter; fills all_results in place.
+    
+    Returns the positions for which the filter left no candidates at all.
+    """
+    group_requests = [requests[i] for i in positions]
+    depth = max(n_results[i] for i in positions)
+    lexical_future = None
+    if lexical_index is not None:
+        depth = max(depth, HYBRID_CANDIDATES)
+        groups, sections = lexical_scope(where)
+        lexical_future = lexical_executor.submit(
+            lambda: [lexical_index.search(request.query, depth, groups=groups, sections=sections)
+                     for request in group_requests]
+        )
+    
+    # Vector search (query embedding önbellekten gelebilir)
+    query_embeddings = embed_queries([request.query for request in group_requests])
+    results = vector_query(query_embeddings, depth, where)
+    
+    rankings = []
+    for j, i in enumerate(positions):
+        chunks = {
+            chunk_id: (doc, metadata, distance_to_similarity(distance))
+            for chunk_id, doc, metadata, distance in zip(
+                results['ids'][j], results['documents'][j], results['metadatas'][j], results['distances'][j]
+            )
+        }
+        rankings.append((chunks, results['ids'][j]))
+    
+    if lexical_future is not None:
+        lexical_hits = lexical_future.result()
+        fused = []
+        for (chunks, vector_ids), hits, i in zip(rankings, lexical_hits, positions):
+            order = reciprocal_rank_fusion([vector_ids, [chunk_id for chunk_id, _ in hits]])[:n_results[i]]
+            fused.append((chunks, order))
+        rankings = fused
+        
+        # Yalnızca BM25'in bulduğu parçalar tek sorguda çekilir; benzerlik, gerçek
+        # vektörleri üzerinden sorgu embedding'iyle kosinüs olarak hesaplanır
+        missing = sorted({chunk_id for chunks, order in rankings for chunk_id in order if chunk_id not in chunks})
+        fetched = fetch_chunks(missing, include_embeddings=True)
+        for (chunks, order), query_embedding in zip(rankings, query_embeddings):
+            for chunk_id in order:
+                if chunk_id in chunks or chunk_id not in fetched:
+                    continue
+                doc, metadata, embedding = fetched[chunk_id]
+                chunks[chunk_id] = (doc, metadata, cosine_similarity(query_embedding, embedding))
+    
+    no_candidates = []
+    for (chunks, order), i in zip(rankings, positions):
+        # Koleksiyondan silinmiş (indeksle uyumsuz) kimlikler atlanır
+        order = [chunk_id for chunk_id in order if chunk_id in chunks][:n_results[i]]
+        if not order:
+            no_candidates.append(i)
+        all_results[i] = format_results(
+            requests[i],
+            [chunks[chunk_id][0] for chunk_id in order],
+            [chunks[chunk_id][1] for chunk_id in order],
+            [chunks[chunk_id][2] for chunk_id in order],
+            order
+        )
+    return no_candidates
+
+def retrieve_batch(requests: List[SearchRequest], paginate: bool = True,
+                   depths: Optional[List[int]] = None) -> List[List[SearchResult]]:
+    """Retrieve chunks for all queries with one batched embedding and one collection.query
+    per distinct where filter.
+    
+    With a BM25 index the lexical search runs in parallel with the vector search
+    and the two rankings are merged by reciprocal-rank fusion; pure name lookups
+    are ranked by the lexical index alone (no ANN search). Queries naming a known drug are
+    restricted to that drug's chunks, intent queries to the matching prospectus
+    sections. With paginate=True every query retrieves a few pages of candidates
+    (candidate_depth) so the next pages can be served via cursor; depths overrides
+    the per-query depth (deeper retrieval for a cursor).
+    """
+    n_results = depths or [candidate_depth(request, paginate) for request in requests]
+    lexical_index = get_lexical_index()
+    wheres = [search_filter(request.query) for request in requests]
+    all_results: List[Optional[List[SearchResult]]] = [None] * len(requests)
+    
+    groups = {}
+    for i, request in enumerate(requests):
+        if lexical_index is not None and lexical_index.is_name_lookup(request.query):
+            all_results[i] = lexical_lookup(request, lexical_index, n_results[i], wheres[i])
+            if all_results[i] is not None:
+                continue
+        groups.setdefault(filter_key(wheres[i]), []).append(i)
+    
+    no_candidates = []
+    for positions in groups.values():
+        no_candidates += retrieve_group(requests, positions, wheres[positions[0]], n_results,
+                                        lexical_index, all_results)
+    
+    # Filtre hiç aday bırakmadıysa (ör. section/drug_key yazılmadan kurulmuş eski koleksiyon)
+    # koşullar sondan birer birer gevşetilir: önce bölüm, sonra ilaç filtresi kalkar
+    retry = [i for i in no_candidates if wheres[i] is not None]
+    while retry:
+        groups = {}
+        for i in retry:
+            wheres[i] = relax_filter(wheres[i])
+            groups.setdefault(filter_key(wheres[i]), []).append(i)
+        no_candidates = []
+        for positions in groups.values():
+            no_candidates += retrieve_group(requests, positions, wheres[positions[0]], n_results,
+                                            lexical_index, all_results)
+        retry = [i for i in no_candidates if wheres[i] is not None]
+    return all_results
+
+async def run_retrieval_batch(key, requests: List[SearchRequest]) -> List[List[SearchResult]]:
+    """MicroBatcher callback: one batched retrieval on the search executor"""
+    async with search_semaphore:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(search_executor, retrieve_batch, requests)
+
 @app.post("/search", response_model=SearchResponse)
 async def enhanced_search(request: SearchRequest):
     """
@@ -359,65 +1205,204 @@ async def enhanced_search(request: SearchRequest):
         if collection is None:
             raise HTTPException(status_code=500, detail="Database bağlantısı yok")
         
+        # Sonraki sayfa: adaylar bellekten, embedding ve vector search yok
+        if request.cursor:
+            return await cursor_page(request, start_time)
+        
         # Input validation
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Query boş olamaz")
         
+        # Full response cache: same query + parameters + collection build -> same answer
+        cache_key = search_cache_key(request)
+        collection_version = get_collection_version()
+        response_cache.set_version(collection_version)
+        answer_cache.set_version(collection_version)
+        cached = get_cached_response(cache_key, request, start_time)
+        if cached is not None:
+            return cached
+        
         logger.info(f"🔍 Enhanced search: '{request.query}' (LLM: {request.use_llm})")
         
-        # Vector search
-        results = collection.query(
-            query_texts=[request.query],
-            n_results=min(request.limit, 20),  # Limit for performance
-            include=['documents', 'metadatas', 'distances']
-        )
+        # Embedding + vector search CPU'da bloklar ve search executor'da çalışır; cevap
+        # üretimi asenkron istemciyle (süre sınırlı, devre kesicili) event loop'ta beklenir
+        formatted_results = await retrieve_results(request)
+        response, cacheable = await build_search_response(request, formatted_results, start_time)
         
-        # Format results
-        formatted_results = []
-        if results['documents'][0]:
-            documents = results['documents'][0]
-            metadatas = results['metadatas'][0]
-            distances = results['distances'][0]
-            ids = results['ids'][0]
-            
-            for i, (doc, metadata, distance, doc_id) in enumerate(zip(documents, metadatas, distances, ids)):
-                # Better similarity calculation
-                similarity = max(0, 1 - (distance / 2))  # Normalize distance better
-                
-                if similarity >= request.minimum_similarity:
-                    result = SearchResult(
-                        document_id=doc_id,
-                        document_name=f"Document_{i+1}",
-                        document_type=metadata.get('document_type', 'KUB'),
-                        text_chunk=doc.strip()[:300] + "..." if len(doc) > 300 else doc.strip(),
-                        similarity_score=round(similarity, 3),
-                        metadata=metadata
-                    )
-                    formatted_results.append(result)
+        # Kural tabanlı yedek cevaplar önbelleğe yazılmaz; servis düzelince yeniden üretilir
+        if cacheable:
+            cache_search_response(cache_key, request, response, formatted_results)
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Search error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def ndjson(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+async def retrieve_results(request: SearchRequest) -> List[SearchResult]:
+    """Retrieval step of /search on the search executor (through the micro-batcher if enabled)"""
+    if search_batcher is not None:
+        # Grup anahtarı event loop'ta yalnızca bellekteki eşleştiricilerle hesaplanır (disk yok);
+        # retrieve_batch filtreleri güncel manifest'lerle yeniden kurar, anahtar yalnızca gruplar
+        key = filter_key(search_filter(request.query, reload=False))
+        return await search_batcher.submit(key, request)
+    async with search_semaphore:
+        loop = asyncio.get_running_loop()
+        return (await loop.run_in_executor(search_executor, retrieve_batch, [request]))[0]
+
+async def search_event_stream(request: SearchRequest, start_time: float):
+    """NDJSON events: results -> token* -> done (or error)"""
+    cache_key = search_cache_key(request)
+    collection_version = get_collection_version()
+    response_cache.set_version(collection_version)
+    answer_cache.set_version(collection_version)
+    cached = get_cached_response(cache_key, request, start_time)
+    if cached is not None:
+        yield ndjson({"type": "results", "results": [r.model_dump() for r in cached.results],
+                      "total_results": cached.total_results, "retrieval_time_ms": cached.search_time_ms})
+        if cached.llm_response is not None:
+            yield ndjson({"type": "token", "text": cached.llm_response.llm_answer})
+        yield ndjson({"type": "done", "llm_response": cached.llm_response and cached.llm_response.model_dump(),
+                      "search_time_ms": cached.search_time_ms, "message": cached.message,
+                      "next_cursor": cached.next_cursor})
+        return
+    
+    try:
+        formatted_results = await retrieve_results(request)
+    except Exception as e:
+        logger.error(f"❌ Stream search error: {e}")
+        yield ndjson({"type": "error", "detail": str(e)})
+        return
+    
+    # Sonuçlar cevap üretimini beklemeden gönderilir
+    yield ndjson({"type": "results", "results": [r.model_dump() for r in formatted_results[:request.limit]],
+                  "total_results": len(formatted_results),
+                  "retrieval_time_ms": int((time.time() - start_time) * 1000)})
+    
+    llm_response = None
+    answer_failed = False
+    outcome = {"generated": True}
+    answer = await stream_answer(request, formatted_results, outcome)
+    if answer is not None:
+        tokens, confidence, sources_used = answer
+        parts = []
+        try:
+            async for token in tokens:
+                parts.append(token)
+                yield ndjson({"type": "token", "text": token})
+            llm_response = LLMResponse(llm_answer="".join(parts).strip(), confidence=confidence,
+                                       sources_used=sources_used)
+        except Exception as e:
+            logger.error(f"🤖 LLM response streaming failed: {e}")
+            answer_failed = True
+    
+    response = make_search_response(request, formatted_results, llm_response, start_time)
+    # Hata ya da kural tabanlı yedek cevap önbelleğe yazılmaz
+    if not answer_failed and outcome["generated"]:
+        cache_search_response(cache_key, request, response, formatted_results)
+    yield ndjson({"type": "done", "llm_response": llm_response and llm_response.model_dump(),
+                  "search_time_ms": response.search_time_ms, "message": response.message,
+                  "next_cursor": response.next_cursor})
+
+@app.post("/search/stream")
+async def stream_search(request: SearchRequest):
+    """
+    Akışlı İlaç Arama (NDJSON)
+    - Önce arama sonuçları, ardından gelen cevap token'ları
+    - Son satır: toplam süre ve tam cevap
+    """
+    start_time = time.time()
+    
+    if collection is None:
+        raise HTTPException(status_code=500, detail="Database bağlantısı yok")
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query boş olamaz")
+    
+    logger.info(f"🔍 Stream search: '{request.query}' (LLM: {request.use_llm})")
+    return StreamingResponse(search_event_stream(request, start_time), media_type="application/x-ndjson")
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def batch_search(request: BatchSearchRequest):
+    """
+    Toplu İlaç Arama
+    - Birden fazla sorgu tek HTTP isteğinde
+    - Tek batch embedding + tek vector query
+    - Sorgu başına ve toplam süreler
+    """
+    start_time = time.time()
+    
+    if collection is None:
+        raise HTTPException(status_code=500, detail="Database bağlantısı yok")
+    if not request.requests:
+        raise HTTPException(status_code=400, detail="En az bir sorgu gerekli")
+    if len(request.requests) > BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Bir batch'te en fazla {BATCH_SEARCH_MAX_QUERIES} sorgu olabilir"
+        )
+    if any(not search_request.query.strip() for search_request in request.requests):
+        raise HTTPException(status_code=400, detail="Query boş olamaz")
+    if any(search_request.cursor for search_request in request.requests):
+        raise HTTPException(status_code=400, detail="Toplu aramada cursor kullanılamaz; sonraki sayfalar için /search kullanın")
+    
+    try:
+        collection_version = get_collection_version()
+        response_cache.set_version(collection_version)
+        answer_cache.set_version(collection_version)
+        responses: List[Optional[SearchResponse]] = []
+        cache_keys = []
+        misses = []
+        for search_request in request.requests:
+            cache_key = search_cache_key(search_request, paginate=False)
+            cache_keys.append(cache_key)
+            # Önbellekten dönen sorgunun süresi yalnızca kendi okuma süresidir
+            responses.append(get_cached_response(cache_key, search_request, time.time()))
+            if responses[-1] is None:
+                misses.append(len(responses) - 1)
         
-        # Generate LLM response if requested and available
-        llm_response = None
-        if request.use_llm and formatted_results:
-            # Try Hugging Face first, then OpenAI fallback
-            if HAS_TRANSFORMERS and llm_pipeline:
-                llm_response = generate_llm_response(request.query, [r.dict() for r in formatted_results])
-            elif HAS_OPENAI:
-                llm_response = generate_openai_response(request.query, [r.dict() for r in formatted_results])
+        logger.info(f"🔍 Batch search: {len(request.requests)} sorgu ({len(misses)} önbellekte yok)")
         
-        search_time = time.time() - start_time
+        retrieval_start = time.time()
+        if misses:
+            miss_requests = [request.requests[i] for i in misses]
+            async with search_semaphore:
+                loop = asyncio.get_running_loop()
+                all_results = await loop.run_in_executor(
+                    search_executor, lambda: retrieve_batch(miss_requests, paginate=False)
+                )
+            retrieval_time = time.time() - retrieval_start
+            # Sorgu başına süre: ortak retrieval'dan eşit payı + kendi cevap üretim süresi.
+            # Cevaplar eşzamanlı üretilir; üst servise giden istek sayısını istemcinin semaforu sınırlar
+            retrieval_share = retrieval_time / len(misses)
+            answer_start = time.time()
+            fresh = await asyncio.gather(*(
+                build_search_response(search_request, formatted_results, answer_start - retrieval_share,
+                                      paginate=False)
+                for search_request, formatted_results in zip(miss_requests, all_results)
+            ))
+            for i, (response, cacheable), formatted_results in zip(misses, fresh, all_results):
+                responses[i] = response
+                if cacheable:
+                    cache_search_response(cache_keys[i], request.requests[i], response, formatted_results)
+        else:
+            retrieval_time = time.time() - retrieval_start
         
-        return SearchResponse(
-            query=request.query,
-            results=formatted_results[:request.limit],
-            llm_response=llm_response,
-            search_time_ms=int(search_time * 1000),
-            total_results=len(formatted_results),
+        total_time = time.time() - start_time
+        return BatchSearchResponse(
+            responses=responses,
+            cached_queries=len(responses) - len(misses),
+            retrieval_time_ms=int(retrieval_time * 1000),
+            total_time_ms=int(total_time * 1000),
             success=True,
-            message=f"{len(formatted_results)} sonuç bulundu" + (" + AI analizi" if llm_response else "")
+            message=f"{len(responses)} sorgu işlendi"
         )
         
     except Exception as e:
-        logger.error(f"❌ Search error: {e}")
+        logger.error(f"❌ Batch search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/")
@@ -428,7 +1413,8 @@ async def root():
         "version": "2.0.0",
         "features": ["Vector Search", "LLM Intelligence", "Real-time Analysis"],
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready"
     }
 
 if __name__ == "__main__":
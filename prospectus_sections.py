@@ -0,0 +1,111 @@
+"""
+Prospektüs Bölümleri
+KÜB'lerin numaralı başlıklarını ("4.8 İstenmeyen etkiler") ve kullanma
+talimatlarının (KT) başlıklarını ("4. Olası yan etkiler nelerdir?", "Hamilelik")
+tanıyıp metni bölümlere ayırır. build_database.py her parçaya bir `section`
+etiketi yazar; API sorgu niyetini INTENT_SECTIONS ile bölüm filtresine çevirir.
+
+Başlıklar katlanmış (fold) metinde, satır başında aranır. Aynı numaralı başlık
+birden fazla kez geçerse (KT başındaki "Bu Kullanma Talimatında:" içindekiler
+listesi) yalnızca sonuncusu bölüm başlangıcı sayılır.
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from turkish_text import fold
+
+# (bölüm etiketi, başlık numarası, katlanmış metinde başlık deseni); numarasız alt başlıklarda None
+SECTION_HEADINGS: List[Tuple[str, Optional[str], str]] = [
+    # KÜB (kısa ürün bilgisi)
+    ('bilesim', '2', r'kalitatif ve kantitatif bilesim'),
+    ('endikasyon', '4.1', r'terapotik endikasyon'),
+    ('pozoloji', '4.2', r'pozoloji'),
+    ('kontrendikasyon', '4.3', r'kontrendikasyon'),
+    ('uyari', '4.4', r'ozel kullanim uyari'),
+    ('etkilesim', '4.5', r'diger tibbi urunler ile etkilesim'),
+    ('gebelik', '4.6', r'gebelik ve laktasyon'),
+    ('arac_kullanimi', '4.7', r'arac ve makine'),
+    ('yan_etki', '4.8', r'istenmeyen etkiler'),
+    ('doz_asimi', '4.9', r'doz asimi'),
+    ('farmakoloji', '5', r'farmakolojik ozellikler'),
+    ('farmasotik', '6', r'farmasotik ozellikler'),
+    ('saklama', '6.4', r'saklamaya yonelik'),
+    # KT (kullanma talimatı); başlıkta ilaç adı geçer
+    ('endikasyon', '1', r'[^\n]{0,80}?nedir ve ne icin kullanilir'),
+    ('kontrendikasyon', '2', r'[^\n]{0,80}?kullanmadan once dikkat edilmesi gerekenler'),
+    ('pozoloji', '3', r'[^\n]{0,80}?nasil kullanilir'),
+    ('yan_etki', '4', r'olasi yan etkiler nelerdir'),
+    ('saklama', '5', r'[^\n]{0,80}?saklanmasi'),
+    # KT alt başlıkları
+    ('bilesim', None, r'etkin madde(?:\s*\(?ler\)?)?\s*:'),
+    ('kontrendikasyon', None, r'[^\n]{0,80}?asagidaki durumlarda kullanmayiniz'),
+    ('uyari', None, r'[^\n]{0,80}?asagidaki durumlarda dikkatli kullaniniz'),
+    ('etkilesim', None, r'diger ilaclar ile birlikte kullanimi'),
+    ('gebelik', None, r'(?:hamilelik|emzirme)[ \t]*$'),
+    ('arac_kullanimi', None, r'arac ve makine kullanimi[ \t]*$'),
+]
+
+# Sorgu niyeti (intent_matcher.QUERY_INTENTS) -> aranacak bölümler
+INTENT_SECTIONS: Dict[str, List[str]] = {
+    'yan_etki': ['yan_etki'],
+    'doz': ['pozoloji', 'doz_asimi'],
+    'kullanim': ['pozoloji'],
+    'genel': ['endikasyon', 'bilesim'],
+    'kontrendikasyon': ['kontrendikasyon', 'uyari'],
+    'hamilelik': ['gebelik'],
+}
+
+
+def _heading_pattern(number: Optional[str], pattern: str) -> str:
+    prefix = re.escape(number) + r"\.?\s+" if number else ""
+    return r"^[ \t]*" + prefix + pattern
+
+
+_HEADING_RE = re.compile(
+    "|".join(
+        f"(?P<h{i}>{_heading_pattern(number, pattern)})"
+        for i, (_, number, pattern) in enumerate(SECTION_HEADINGS)
+    ),
+    re.MULTILINE
+)
+
+
+def find_sections(folded: str) -> List[Tuple[int, str]]:
+    """Katlanmış metindeki bölüm başlangıçlarını (konum, etiket) olarak sırayla döndürür."""
+    headings: List[Optional[Tuple[int, str]]] = []
+    last_numbered: Dict[Tuple[str, str], int] = {}
+    for match in _HEADING_RE.finditer(folded):
+        label, number, _ = SECTION_HEADINGS[int(match.lastgroup[1:])]
+        if number is not None:
+            # İçindekiler listesi: aynı numaralı başlığın önceki geçişi atılır
+            previous = last_numbered.get((label, number))
+            if previous is not None:
+                headings[previous] = None
+            last_numbered[(label, number)] = len(headings)
+        headings.append((match.start(), label))
+    return [heading for heading in headings if heading is not None]
+
+
+def chunk_sections(text: str, chunks: Sequence[str]) -> List[str]:
+    """Her parçanın orta noktasının düştüğü bölümün etiketi (başlıktan önceyse '').
+
+    Parçalar chunk_text çıktısıdır: metinde sırayla ve örtüşerek yer alırlar,
+    konumları katlanmış metinde str.find ile bulunur.
+    """
+    folded = fold(text)
+    sections = find_sections(folded)
+    starts = [start for start, _ in sections]
+    labels = []
+    cursor = 0
+    for chunk in chunks:
+        folded_chunk = fold(chunk)
+        position = folded.find(folded_chunk, cursor)
+        if position < 0:
+            labels.append('')
+            continue
+        cursor = position + 1
+        index = bisect_right(starts, position + len(folded_chunk) // 2) - 1
+        labels.append(sections[index][1] if index >= 0 else '')
+    return labels
@@ -0,0 +1,74 @@
+"""
+Sorgu Mikro-Toplayıcı
+Kısa bir pencere içinde gelen eşzamanlı istekleri toplayıp tek bir toplu
+çağrıyla çalıştırır ve sonuçları bekleyen isteklere geri dağıtır. Aynı
+anahtara (ör. aynı `where` filtresi) sahip istekler aynı batch'e girer.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Set, Tuple
+
+
+class MicroBatcher:
+    """İstekleri window_ms boyunca ya da max_batch_size dolana kadar biriktirir.
+
+    run_batch(anahtar, öğeler) bir coroutine'dir ve öğelerle aynı sırada,
+    aynı uzunlukta bir sonuç listesi döndürmelidir. Batch'te bir hata olursa
+    o batch'teki tüm istekler aynı hatayı alır.
+    """
+
+    def __init__(self, run_batch: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+                 window_ms: float, max_batch_size: int):
+        self.run_batch = run_batch
+        self.window_seconds = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.batches = 0
+        self.items = 0
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window_seconds, self._flush, key)
+        return await future
+
+    def _flush(self, key: Hashable):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, batch: List[Tuple[Any, asyncio.Future]]):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.run_batch(key, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():  # İstemci bağlantıyı kapatmış olabilir
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window_seconds * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "requests": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,199 @@
+"""
+Arama Önbellekleri
+Arama API'sinin kullandığı, süreç içi, boyut ve süre sınırlı önbellekler.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """Kayıt sayısı ve kayıt yaşıyla sınırlı, iş parçacığı güvenli LRU önbellek.
+
+    ttl_seconds'tan eski kayıtlar erişimde ıskalama sayılıp silinir; önbellek
+    dolduğunda en uzun süredir kullanılmayan kayıt atılır.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                stored_at, value = item
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+
+
+class ResponseCache:
+    """Koleksiyon sürümüne bağlı, JSON olarak saklanabilen yanıtlar için önbellek.
+
+    Bellekte bir TTLCache tutar; sqlite_path verilirse kayıtlar ayrıca SQLite'a
+    yazılır, böylece aynı diski paylaşan worker'lar ve yeniden başlatmalar
+    önbelleği ortak kullanır. SQLite dosyası sonradan open() ile de açılabilir
+    (ör. uygulama başlangıcında). Sürüm (ör. derleme kimliği) değiştiğinde eski
+    sürümün kayıtları kendiliğinden geçersiz olur; sürüm belirlenmeden yapılan
+    kayıtlar yalnızca bellekte tutulur.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float, sqlite_path: Optional[str] = None):
+        self.memory = TTLCache(maxsize, ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = None
+        self.version: Optional[str] = None
+        self.disk_hits = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if sqlite_path:
+            self.open(sqlite_path)
+
+    def open(self, sqlite_path: str):
+        """SQLite deposunu açar (dizini yoksa oluşturur); sürüm biliniyorsa eski sürüm kayıtlarını atar."""
+        os.makedirs(os.path.dirname(sqlite_path) or ".", exist_ok=True)
+        db = sqlite3.connect(sqlite_path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, version TEXT NOT NULL, "
+            "created_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        with self._lock:
+            if self.version is not None:
+                db.execute("DELETE FROM responses WHERE version != ?", (self.version,))
+            db.commit()
+            self._db, self.sqlite_path = db, sqlite_path
+
+    @staticmethod
+    def _key_text(key: Hashable) -> str:
+        return json.dumps(key, ensure_ascii=False)
+
+    def set_version(self, version: str):
+        """Koleksiyon sürümü değiştiyse bellekteki ve diskteki eski kayıtları atar."""
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            self.memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses WHERE version != ?", (version,))
+                self._db.commit()
+            self.version = version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None or self._db is None or self.version is None:
+            return value
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM responses WHERE key = ? AND version = ? AND created_at >= ?",
+                (self._key_text(key), self.version, time.time() - self.ttl_seconds)
+            ).fetchone()
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        self.disk_hits += 1
+        self.memory.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self.memory.put(key, value)
+        if self._db is None or self.version is None:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, version, created_at, value) VALUES (?, ?, ?, ?)",
+                (self._key_text(key), self.version, time.time(), json.dumps(value, ensure_ascii=False))
+            )
+            self._db.commit()
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        stats.update({
+            "version": self.version,
+            "backend": "sqlite" if self._db is not None else "memory",
+            "disk_hits": self.disk_hits
+        })
+        return stats
+
+
+class FileBackedValue:
+    """Diskteki bir dosyadan üretilen değeri, dosya değiştiğinde yeniden yükler.
+
+    Dosya imzası (mtime, boyut) her get() çağrısında os.stat ile kontrol edilir;
+    yalnızca değiştiğinde loader(path) çağrılır. Dosya yoksa ya da yüklenemezse
+    None döner (hata `error` alanında tutulur). Diske hiç dokunulmaması gereken
+    yerlerde (ör. event loop) current() son yüklenen değeri döndürür.
+    """
+
+    def __init__(self, path: str, loader: Callable[[str], Any]):
+        self.path = path
+        self.loader = loader
+        self.error: Optional[Exception] = None
+        self._signature = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[Any]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    try:
+                        self._value, self.error = self.loader(self.path), None
+                    except Exception as e:
+                        self._value, self.error = None, e
+                    self._signature = signature
+        return self._value
+
+    def current(self) -> Optional[Any]:
+        """Son yüklenen değer; dosyaya bakmaz, hiç yüklenmediyse None."""
+        return self._value
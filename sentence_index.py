@@ -0,0 +1,172 @@
+"""
+Cümle Düzeyi Alt İndeks
+Koleksiyondaki her parçanın cümleleri, vektörleri ve ait oldukları parça
+kimliğiyle birlikte saklanır. build_database.py derlemenin sonunda koleksiyondan
+kurar; API cevap aşamasında ilk k sonucun cümlelerini tek matris çarpımıyla
+sorguya göre sıralar ve en iyi cümleleri seçer.
+
+Cümle bölme ondalık sayılara dayanıklıdır: nokta yalnızca ardından boşluk
+geliyorsa cümle sonu sayılır ("2.5 mg" bölünmez); "bkz.", "örn." gibi
+kısaltmalar ve "1." gibi madde numaraları da cümleyi bitirmez.
+
+Disk düzeni:
+    <ad>.npy -> float16, L2-normalize cümle vektörleri (satır = cümle); memmap ile açılır
+    <ad>.npz -> chunk_ids    -> parça kimlikleri
+                indptr       -> parça başına cümle satırı aralığı (CSR)
+                text_offsets -> cümle başına text_blob bayt aralığı
+                text_blob    -> UTF-8 cümle metinleri art arda
+.npz en son yazılır; API bu dosyanın değişimini izler.
+"""
+
+import os
+import re
+from typing import Callable, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from turkish_text import fold
+
+SENTENCE_MIN_CHARS = 20  # Daha kısa parçalar (başlık kırıntıları, tablo hücreleri) atlanır
+EMBED_BATCH_SIZE = 512
+
+# Ardından boşluk gelen cümle sonu, boş satır ya da madde işareti
+_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+|\n\s*\n|\s*[•▪●]\s*")
+_ABBREVIATIONS = frozenset(fold(word) for word in """
+    bkz örn vb vs dr prof doç yak yakl ort maks min max no sf
+""".split())
+
+
+def split_sentences(text: str) -> List[str]:
+    """Metni cümlelere böler; boşluklar tekilleştirilir, kısa parçalar atılır."""
+    sentences = []
+    start = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        end = match.start()
+        if end > start and text[end - 1] == '.':
+            words = text[start:end - 1].rsplit(None, 1)
+            last_word = words[-1].lstrip("([\"'") if words else ""
+            if fold(last_word) in _ABBREVIATIONS or (last_word.isdigit() and len(last_word) <= 2):
+                continue  # Kısaltma ya da madde numarası: cümle sürüyor
+        sentences.append(text[start:end])
+        start = match.end()
+    sentences.append(text[start:])
+    sentences = (" ".join(sentence.split()) for sentence in sentences)
+    return [sentence for sentence in sentences if len(sentence) >= SENTENCE_MIN_CHARS]
+
+
+class SentenceIndex:
+    """Parça kimliğinden cümle satırlarına CSR eşlemesi + float16 cümle vektörleri."""
+
+    def __init__(self, chunk_ids: List[str], indptr: np.ndarray, embeddings: np.ndarray,
+                 text_offsets: np.ndarray, text_blob: np.ndarray):
+        self.chunk_ids = chunk_ids
+        self.chunk_rows = {chunk_id: i for i, chunk_id in enumerate(chunk_ids)}
+        self.indptr = indptr
+        self.embeddings = embeddings
+        self.text_offsets = text_offsets
+        self.text_blob = text_blob
+
+    def __len__(self) -> int:
+        return int(self.embeddings.shape[0])
+
+    @staticmethod
+    def embeddings_path(path: str) -> str:
+        return f"{os.path.splitext(path)[0]}.npy"
+
+    @classmethod
+    def build(cls, path: str, documents: Iterable[Tuple[str, str]],
+              embed: Callable[[List[str]], Sequence[Sequence[float]]],
+              batch_size: int = EMBED_BATCH_SIZE) -> "SentenceIndex":
+        """(parça kimliği, metin) kayıtlarından indeksi kurup path'e yazar.
+
+        Cümleler önce bölünür, vektörler sonra batch'ler halinde doğrudan diskteki
+        .npy dosyasına yazılır; bellekte tüm vektör matrisi tutulmaz.
+        """
+        chunk_ids = []
+        indptr = [0]
+        sentences = []
+        for chunk_id, text in documents:
+            chunk_ids.append(chunk_id)
+            sentences.extend(split_sentences(text or ""))
+            indptr.append(len(sentences))
+
+        encoded = [sentence.encode("utf-8") for sentence in sentences]
+        text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=text_offsets[1:])
+        text_blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        embeddings_path = cls.embeddings_path(path)
+        tmp_embeddings_path = f"{embeddings_path}.tmp.npy"
+        matrix = None
+        for start in range(0, len(sentences), batch_size):
+            vectors = np.asarray(embed(sentences[start:start + batch_size]), dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(
+                    tmp_embeddings_path, mode="w+", dtype=np.float16, shape=(len(sentences), vectors.shape[1])
+                )
+            matrix[start:start + len(vectors)] = vectors
+        if matrix is None:
+            np.save(tmp_embeddings_path, np.zeros((0, 0), dtype=np.float16))
+        else:
+            matrix.flush()
+            del matrix
+        os.replace(tmp_embeddings_path, embeddings_path)
+
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            chunk_ids=np.array(chunk_ids, dtype=str),
+            indptr=np.asarray(indptr, dtype=np.int64),
+            text_offsets=text_offsets,
+            text_blob=text_blob
+        )
+        os.replace(tmp_path, path)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str) -> "SentenceIndex":
+        with np.load(path) as data:
+            chunk_ids = data["chunk_ids"].tolist()
+            indptr = data["indptr"]
+            text_offsets = data["text_offsets"]
+            text_blob = data["text_blob"]
+        embeddings = np.load(cls.embeddings_path(path), mmap_mode="r")
+        if embeddings.shape[0] != len(text_offsets) - 1:
+            raise ValueError(f"Cümle vektörleri ({embeddings.shape[0]}) ile cümle sayısı ({len(text_offsets) - 1}) uyuşmuyor")
+        return cls(chunk_ids, indptr, embeddings, text_offsets, text_blob)
+
+    def sentence(self, row: int) -> str:
+        start, end = self.text_offsets[row], self.text_offsets[row + 1]
+        return self.text_blob[start:end].tobytes().decode("utf-8")
+
+    def best_sentences(self, query_embedding: Sequence[float], chunk_ids: Sequence[str],
+                       top_k: int) -> List[Tuple[str, str, float]]:
+        """Verilen parçaların cümleleri içinden sorguya en benzer top_k tanesi.
+
+        (cümle, parça kimliği, kosinüs benzerliği) listesi; sonuçlar metindeki
+        sıraya (parça sırası, parça içi konum) göre döner, tekrar eden cümleler atlanır.
+        """
+        ranges = []
+        for chunk_id in dict.fromkeys(chunk_ids):
+            row = self.chunk_rows.get(chunk_id)
+            if row is not None and self.indptr[row + 1] > self.indptr[row]:
+                ranges.append((chunk_id, int(self.indptr[row]), int(self.indptr[row + 1])))
+        if not ranges or top_k <= 0:
+            return []
+
+        rows = np.concatenate([np.arange(start, end) for _, start, end in ranges])
+        parents = [chunk_id for chunk_id, start, end in ranges for _ in range(end - start)]
+        query = np.array(query_embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        scores = np.asarray(self.embeddings[rows], dtype=np.float32) @ query
+
+        # Parçalar örtüştüğü için aynı cümle komşu parçalarda tekrar eder; bir kez alınır
+        best = {}
+        for i in np.argsort(-scores, kind="stable"):
+            text = self.sentence(int(rows[i]))
+            if text not in best:
+                best[text] = int(i)
+                if len(best) == top_k:
+                    break
+        return [(text, parents[i], float(scores[i])) for text, i in sorted(best.items(), key=lambda item: item[1])]
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+import llm_api
+from generation_client import GenerationClient
+from search_cache import ResponseCache
+
+
+class CountingClient(GenerationClient):
+    """Her çağrıda farklı cevap üreten, çağrıları sayan sahte üretici."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, messages, timeout=None):
+        self.calls += 1
+        return f"Cevap {self.calls}"
+
+    async def stream(self, messages, timeout=None):
+        yield await self.generate(messages, timeout)
+
+
+SEARCH_RESULTS = [
+    {"document_id": f"parol_kub_{i}", "text_chunk": "Parol 500 mg tablet.", "metadata": {"drug_name": "PAROL"}}
+    for i in range(5)
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = CountingClient()
+    monkeypatch.setattr(llm_api, "generation_client", client)
+    monkeypatch.setattr(llm_api, "answer_cache", ResponseCache(16, 60))
+    return client
+
+
+def generate(query):
+    response, generated = asyncio.run(llm_api.generate_openai_response(query, SEARCH_RESULTS))
+    assert generated
+    return response.llm_answer
+
+
+def test_paraphrases_with_same_intent_share_answer(client):
+    first = generate("parol nedir")
+    assert generate("Parol ne için kullanılır?") == first
+    assert client.calls == 1
+
+
+def test_free_form_questions_without_intent_do_not_share_answer(client):
+    assert llm_api.intent_matcher.primary("parol ile alkol alınır mı") is None
+    assert llm_api.intent_matcher.primary("parol çocuklara verilir mi") is None
+
+    first = generate("parol ile alkol alınır mı")
+    second = generate("parol çocuklara verilir mi")
+
+    assert first != second
+    assert client.calls == 2
+    # Aynı serbest soru (büyük/küçük harf, boşluk farkıyla) önbellekten döner
+    assert generate("  Parol ile alkol  alınır mı") == first
+    assert client.calls == 2
+
+
+def test_put_before_version_stays_in_memory(tmp_path):
+    cache = ResponseCache(16, 60)
+    cache.open(str(tmp_path / "cevap.sqlite3"))
+    cache.put(("niyet",), {"llm_answer": "Cevap"})  # set_version'dan önce: hata vermez
+    assert cache.get(("niyet",)) == {"llm_answer": "Cevap"}
+
+    cache.set_version("build-1")
+    cache.put(("niyet",), {"llm_answer": "Kalıcı"})
+    reopened = ResponseCache(16, 60, str(tmp_path / "cevap.sqlite3"))
+    reopened.set_version("build-1")
+    assert reopened.get(("niyet",)) == {"llm_answer": "Kalıcı"}
+
+
+def test_import_does_not_create_answer_cache_file():
+    assert llm_api.answer_cache.stats()["backend"] == "memory"
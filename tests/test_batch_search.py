@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import llm_api
+from search_cache import ResponseCache
+
+RETRIEVAL_SECONDS = 0.09
+ANSWER_SECONDS = {"parol": 0.0, "aspirin": 0.1, "majezik": 0.2}
+
+
+def make_results(query):
+    return [llm_api.SearchResult(document_id=f"{query}_0", document_name=query, document_type="KUB",
+                                 text_chunk=f"{query} tablet.", similarity_score=0.9, metadata={})]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def retrieve_batch(requests, paginate=True, depths=None):
+        time.sleep(RETRIEVAL_SECONDS)  # Tüm sorgular için tek ortak retrieval
+        return [make_results(request.query) for request in requests]
+
+    async def generate_answer(request, formatted_results):
+        await asyncio.sleep(ANSWER_SECONDS[request.query])
+        return llm_api.LLMResponse(llm_answer=request.query, confidence="high", sources_used=1), True
+
+    monkeypatch.setattr(llm_api, "collection", object())
+    monkeypatch.setattr(llm_api, "retrieve_batch", retrieve_batch)
+    monkeypatch.setattr(llm_api, "generate_answer", generate_answer)
+    monkeypatch.setattr(llm_api, "search_semaphore", asyncio.Semaphore(1))
+    monkeypatch.setattr(llm_api, "response_cache", ResponseCache(16, 60))
+    monkeypatch.setattr(llm_api, "answer_cache", ResponseCache(16, 60))
+    return TestClient(llm_api.app)
+
+
+def test_batch_reports_each_query_own_time(client):
+    body = client.post("/search/batch", json={"requests": [{"query": query} for query in ANSWER_SECONDS]}).json()
+
+    times = [response["search_time_ms"] for response in body["responses"]]
+    # Her sorgu: ortak retrieval'ın üçte biri (~30 ms) + kendi cevap süresi
+    for search_time, answer_seconds in zip(times, ANSWER_SECONDS.values()):
+        assert 25 <= search_time - answer_seconds * 1000 < 80
+    assert times[0] < body["retrieval_time_ms"] < times[2] < body["total_time_ms"]
+
+    cached = client.post("/search/batch", json={"requests": [{"query": "parol"}]}).json()
+    assert cached["cached_queries"] == 1
+    assert cached["responses"][0]["search_time_ms"] < 10
+
+
+def test_batch_rejects_cursor(client):
+    response = client.post("/search/batch", json={"requests": [{"query": "parol", "cursor": "abc:10"}]})
+    assert response.status_code == 400
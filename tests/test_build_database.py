@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+
+import build_database
+
+
+def crashing_process_pdf(pdf_info, text_cache=None):
+    """process_pdf yerine: adı "crash" içeren dosyada işçi süreci öldürür."""
+    if "crash" in pdf_info["path"]:
+        os._exit(1)
+    time.sleep(0.2)  # Çökme anında diğer işler yarıda kalsın
+    return {"pdf": pdf_info, "text_found": True, "chunks": [pdf_info["path"]], "error": None}
+
+
+@pytest.mark.parametrize("crash_at", [0, 1, 5, 11])
+def test_iter_processed_pdfs_isolates_crashing_worker(monkeypatch, crash_at):
+    monkeypatch.setattr(build_database, "process_pdf", crashing_process_pdf)
+    paths = [f"data/kub/ilac_{i}.pdf" for i in range(12)]
+    paths[crash_at] = "data/kub/crash.pdf"
+
+    results = list(build_database.iter_processed_pdfs([{"path": path} for path in paths], workers=2))
+
+    assert [result["pdf"]["path"] for result in results] == paths
+    failed = [result["pdf"]["path"] for result in results if result["error"]]
+    assert failed == ["data/kub/crash.pdf"]
+    assert "BrokenProcessPool" in results[crash_at]["error"]
+
+
+def unpicklable_process_pdf(pdf_info, text_cache=None):
+    """process_pdf yerine: adı "bad" içeren dosyada ana sürece aktarılamayan sonuç döndürür."""
+    result = {"pdf": pdf_info, "text_found": True, "chunks": [pdf_info["path"]], "error": None}
+    if "bad" in pdf_info["path"]:
+        result["chunks"] = [lambda: None]
+    return result
+
+
+def test_iter_processed_pdfs_fails_only_the_file_whose_result_raises(monkeypatch):
+    monkeypatch.setattr(build_database, "process_pdf", unpicklable_process_pdf)
+    paths = [f"data/kub/ilac_{i}.pdf" for i in range(6)]
+    paths[2] = "data/kub/bad.pdf"
+
+    results = list(build_database.iter_processed_pdfs([{"path": path} for path in paths], workers=2))
+
+    assert [result["pdf"]["path"] for result in results] == paths
+    assert [result["pdf"]["path"] for result in results if result["error"]] == ["data/kub/bad.pdf"]
+
+
+def test_iter_processed_pdfs_propagates_input_errors(monkeypatch):
+    monkeypatch.setattr(build_database, "process_pdf", unpicklable_process_pdf)
+
+    def pdf_files():
+        yield {"path": "data/kub/ilac_0.pdf"}
+        raise OSError("klasör okunamadı")
+
+    with pytest.raises(OSError, match="klasör okunamadı"):
+        list(build_database.iter_processed_pdfs(pdf_files(), workers=2))
+
+
+def test_process_pdf_isolated_reports_crash(monkeypatch):
+    monkeypatch.setattr(build_database, "process_pdf", crashing_process_pdf)
+
+    assert build_database.process_pdf_isolated({"path": "ok.pdf"})["error"] is None
+    assert build_database.process_pdf_isolated({"path": "crash.pdf"})["error"].startswith("BrokenProcessPool")
+
+
+@pytest.mark.parametrize("text, stats, cached", [
+    ("Parol 500 mg tablet", {"failed_pages": 0}, True),
+    ("", {"failed_pages": 0}, False),
+    ("Parol 500 mg tablet", {"failed_pages": 1}, False),
+    ("Parol 500 mg tablet", {"failed_pages": 0, "error": "EOF marker not found"}, False),
+])
+def test_process_pdf_caches_only_complete_extractions(monkeypatch, tmp_path, text, stats, cached):
+    def fake_extract(pdf_path, extract_stats):
+        extract_stats.update(stats)
+        return text
+
+    pdf_path = tmp_path / "parol.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    monkeypatch.setattr(build_database, "extract_text_from_pdf", fake_extract)
+    text_cache = build_database.TextCache(str(tmp_path / "text_cache"))
+
+    result = build_database.process_pdf({"path": str(pdf_path)}, text_cache)
+
+    assert (text_cache.get(result["fingerprint"]["sha256"]) is not None) is cached
+    assert result["text_stored"] is cached  # Dizine yalnızca yazılan blob kaydedilir
+
+
+@pytest.mark.parametrize("text, ingredients", [
+    ("Etkin madde: Her bir tablet 500 mg parasetamol içerir.", ["parasetamol"]),
+    ("Etkin madde: Amoksisilin trihidrat (amoksisiline eşdeğer) 875 mg, "
+     "potasyum klavulanat (klavulanik asite eşdeğer) 125 mg", ["amoksisilin", "klavulanat"]),
+    ("Etkin maddeler:\n Her film kaplı tablet 5 mg amlodipin besilat ve 10 mg atorvastatin kalsiyum içerir",
+     ["amlodipin", "atorvastatin"]),
+    ("Yardımcı maddeler: laktoz", []),
+    # ASCII'ye çevrilmiş metin: gürültü katlanmış biçimde de atılır
+    ("ETKIN MADDE: Her bir tablet 500 mg parasetamol icerir.", ["parasetamol"]),
+    ("Etkin madde: Her kapsul etkin madde olarak 20 mg omeprazol ihtiva eder", ["omeprazol"]),
+    ("Etkin maddeler: amoksisilin trihidrat (amoksisiline esdeger) 875 mg, potasyum klavulanat 125 mg",
+     ["amoksisilin", "klavulanat"]),
+])
+def test_extract_active_ingredients_normalizes_names(text, ingredients):
+    assert build_database.extract_active_ingredients(text) == ingredients
@@ -0,0 +1,182 @@
+import re
+import json
+import asyncio
+
+import pytest
+
+from generation_client import CircuitBreaker, CircuitOpenError, GenerationError, OpenAICompatibleClient
+
+
+class FakeOpenAIServer:
+    """Yerel, OpenAI uyumlu sahte /v1/chat/completions sunucusu.
+
+    Her istek script'teki sıradaki davranışla yanıtlanır (bitince "ok"):
+    ("ok", içerik), ("status", kod), ("sleep", saniye), ("stream", [parçalar]).
+    """
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.requests = []
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}/v1"
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(re.search(rb"content-length:\s*(\d+)", head, re.IGNORECASE).group(1))
+            self.requests.append(json.loads(await reader.readexactly(length)))
+            action, value = self.script.pop(0) if self.script else ("ok", "Tamam.")
+
+            status, content_type = 200, "application/json"
+            if action == "status":
+                status, body = value, json.dumps({"error": {"message": "upstream"}})
+            elif action == "stream":
+                content_type = "text/event-stream"
+                body = "".join(
+                    f"data: {json.dumps({'choices': [{'delta': {'content': token}}]})}\n\n" for token in value
+                ) + "data: [DONE]\n\n"
+            else:
+                if action == "sleep":
+                    await asyncio.sleep(value)
+                    value = "Geç cevap."
+                body = json.dumps({"choices": [{"message": {"role": "assistant", "content": value}}]})
+
+            data = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} X\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("ascii") + data
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+MESSAGES = [{"role": "user", "content": "Parol yan etkileri nelerdir?"}]
+
+
+def make_client(server, **kwargs):
+    kwargs.setdefault("retry_backoff", 0.01)
+    return OpenAICompatibleClient(server.base_url, "test-key", "test-model", **kwargs)
+
+
+def test_generate_returns_stripped_content():
+    async def scenario():
+        async with FakeOpenAIServer([("ok", "  Bulantı görülebilir.  ")]) as server:
+            client = make_client(server)
+            try:
+                assert await client.generate(MESSAGES) == "Bulantı görülebilir."
+            finally:
+                await client.aclose()
+            assert server.requests[0]["model"] == "test-model"
+            assert server.requests[0]["messages"] == MESSAGES
+
+    asyncio.run(scenario())
+
+
+def test_generate_retries_transient_status():
+    async def scenario():
+        async with FakeOpenAIServer([("status", 503), ("ok", "İkinci denemede.")]) as server:
+            client = make_client(server, retries=1)
+            try:
+                assert await client.generate(MESSAGES) == "İkinci denemede."
+            finally:
+                await client.aclose()
+            assert len(server.requests) == 2
+            assert client.retried == 1
+            assert client.breaker.failures == 0
+
+    asyncio.run(scenario())
+
+
+def test_generate_does_not_retry_client_errors():
+    async def scenario():
+        async with FakeOpenAIServer([("status", 400)]) as server:
+            client = make_client(server, retries=2)
+            try:
+                with pytest.raises(GenerationError):
+                    await client.generate(MESSAGES)
+            finally:
+                await client.aclose()
+            assert len(server.requests) == 1
+
+    asyncio.run(scenario())
+
+
+def test_generate_times_out():
+    async def scenario():
+        async with FakeOpenAIServer([("sleep", 2.0)]) as server:
+            client = make_client(server, timeout=0.2, retries=0)
+            try:
+                with pytest.raises(GenerationError, match="zaman aşımı"):
+                    await client.generate(MESSAGES)
+            finally:
+                await client.aclose()
+            assert client.stats()["timeouts"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_generate_rejects_null_content():
+    async def scenario():
+        async with FakeOpenAIServer([("ok", None)]) as server:
+            client = make_client(server)
+            try:
+                with pytest.raises(GenerationError):
+                    await client.generate(MESSAGES)
+            finally:
+                await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_circuit_breaker_opens_and_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=lambda: now[0])
+
+    async def scenario():
+        async with FakeOpenAIServer([("status", 500), ("status", 500), ("ok", "Düzeldi.")]) as server:
+            client = make_client(server, retries=0, breaker=breaker)
+            try:
+                for _ in range(2):
+                    with pytest.raises(GenerationError):
+                        await client.generate(MESSAGES)
+                assert breaker.state == "open"
+
+                # Açık devre üst servise istek göndermez
+                with pytest.raises(CircuitOpenError):
+                    await client.generate(MESSAGES)
+                assert len(server.requests) == 2
+
+                now[0] += 30
+                assert breaker.state == "half_open"
+                assert await client.generate(MESSAGES) == "Düzeldi."
+                assert breaker.state == "closed"
+            finally:
+                await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_stream_yields_tokens_and_retries():
+    async def scenario():
+        async with FakeOpenAIServer([("status", 502), ("stream", ["Baş", " ağrısı", "."])]) as server:
+            client = make_client(server, retries=1)
+            try:
+                tokens = [token async for token in client.stream(MESSAGES)]
+            finally:
+                await client.aclose()
+            assert tokens == ["Baş", " ağrısı", "."]
+            assert server.requests[-1]["stream"] is True
+            assert client.retried == 1
+
+    asyncio.run(scenario())
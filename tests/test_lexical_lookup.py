@@ -0,0 +1,74 @@
+import pytest
+
+import llm_api
+from lexical_index import BM25Index
+from search_cache import TTLCache
+
+DOCUMENTS = {
+    "parol_0": "Parol 500 mg tablet parasetamol içerir. Parol ağrı kesicidir.",
+    "parol_1": "Parol kullanmadan önce doktorunuza danışınız.",
+    "arveles_0": "Arveles 25 mg film tablet deksketoprofen içerir.",
+}
+EMBEDDINGS = {"parol_0": [1.0, 0.0], "parol_1": [0.6, 0.8], "arveles_0": [0.0, 1.0]}
+
+
+class FakeCollection:
+    """collection.get çağrılarını kaydeden sahte Chroma koleksiyonu."""
+
+    def __init__(self):
+        self.includes = []
+
+    def get(self, ids, include):
+        self.includes.append(include)
+        result = {"ids": ids, "documents": [DOCUMENTS[i] for i in ids], "metadatas": [{} for _ in ids]}
+        if "embeddings" in include:
+            result["embeddings"] = [EMBEDDINGS[i] for i in ids]
+        return result
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    collection = FakeCollection()
+    encoded = []
+
+    def embedding_function(queries):
+        encoded.extend(queries)
+        return [[1.0, 0.0] for _ in queries]
+
+    monkeypatch.setattr(llm_api, "collection", collection)
+    monkeypatch.setattr(llm_api, "query_embedding_cache", TTLCache(16, 60))
+    monkeypatch.setattr(llm_api, "get_embedding_function", lambda: embedding_function)
+    return collection, encoded
+
+
+@pytest.fixture
+def index():
+    return BM25Index.build(DOCUMENTS.items())
+
+
+def test_cold_name_lookup_skips_query_encode(fake, index):
+    collection, encoded = fake
+    results = llm_api.lexical_lookup(llm_api.SearchRequest(query="parol"), index, 10)
+
+    assert [result.document_id for result in results] == ["parol_0", "parol_1"]
+    assert results[0].similarity_score == 1.0 and 0 < results[1].similarity_score < 1
+    assert encoded == []
+    assert collection.includes == [["documents", "metadatas"]]
+
+
+def test_name_lookup_uses_cosine_when_embedding_is_cached(fake, index):
+    collection, encoded = fake
+    llm_api.embed_queries(["Parol"])
+    results = llm_api.lexical_lookup(llm_api.SearchRequest(query="parol"), index, 10)
+
+    assert encoded == ["parol"]
+    assert [result.similarity_score for result in results] == [1.0, llm_api.distance_to_similarity(1 - 0.6)]
+    assert "embeddings" in collection.includes[-1]
+
+
+def test_name_lookup_encodes_for_minimum_similarity(fake, index):
+    _, encoded = fake
+    results = llm_api.lexical_lookup(llm_api.SearchRequest(query="parol", minimum_similarity=0.9), index, 10)
+
+    assert encoded == ["parol"]
+    assert [result.document_id for result in results] == ["parol_0"]
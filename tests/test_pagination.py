@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+import llm_api
+from search_cache import TTLCache
+
+
+def make_results(ids):
+    return [
+        llm_api.SearchResult(document_id=chunk_id, document_name=chunk_id, document_type="KUB",
+                             text_chunk="Parol 500 mg tablet.", similarity_score=0.5, metadata={})
+        for chunk_id in ids
+    ]
+
+
+@pytest.fixture
+def ranking(monkeypatch):
+    """Sahte retrieve_batch: istenen derinlik kadar adayı sıralı döndürür, derinlikleri kaydeder."""
+    calls = []
+    total = [f"parol_{i}" for i in range(45)]
+
+    def retrieve_batch(requests, paginate=True, depths=None):
+        depth = (depths or [llm_api.candidate_depth(request, paginate) for request in requests])[0]
+        calls.append(depth)
+        return [make_results(total[:depth])]
+
+    monkeypatch.setattr(llm_api, "retrieve_batch", retrieve_batch)
+    monkeypatch.setattr(llm_api, "candidate_cache", TTLCache(16, 60))
+    monkeypatch.setattr(llm_api, "search_semaphore", asyncio.Semaphore(1))
+    monkeypatch.setattr(llm_api, "SEARCH_CANDIDATE_MULTIPLIER", 2)
+    monkeypatch.setattr(llm_api, "SEARCH_CANDIDATE_DEPTH", 100)
+    return calls, total
+
+
+def first_page(request):
+    formatted_results = llm_api.retrieve_batch([request])[0]
+    return llm_api.make_search_response(request, formatted_results, None, time.time())
+
+
+def test_first_page_fetches_a_multiple_of_limit(ranking):
+    calls, _ = ranking
+    response = first_page(llm_api.SearchRequest(query="parol", limit=10))
+
+    assert calls == [20]
+    assert response.total_results == 20 and response.next_cursor
+
+
+def test_cursor_past_cached_candidates_retrieves_deeper(ranking):
+    calls, total = ranking
+    request = llm_api.SearchRequest(query="parol", limit=10)
+    cursor = first_page(request).next_cursor
+    seen = []
+    while cursor:
+        page = asyncio.run(llm_api.cursor_page(request.model_copy(update={"cursor": cursor}), time.time()))
+        seen += [result.document_id for result in page.results]
+        cursor = page.next_cursor
+
+    assert seen == total[10:]
+    assert calls == [20, 60]  # Üçüncü sayfada bir kez derine inilir (30 * 2), sonra aday biter
+
+
+def test_short_ranking_has_no_deeper_cursor(ranking):
+    calls, _ = ranking
+    response = first_page(llm_api.SearchRequest(query="parol", limit=30))
+
+    assert response.total_results == 45 and response.next_cursor
+    page = asyncio.run(llm_api.cursor_page(
+        llm_api.SearchRequest(query="parol", limit=30, cursor=response.next_cursor), time.time()
+    ))
+    assert len(page.results) == 15 and page.next_cursor is None
+    assert calls == [60]
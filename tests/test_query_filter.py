@@ -0,0 +1,29 @@
+import asyncio
+import json
+
+import llm_api
+from search_cache import FileBackedValue
+
+
+def test_batch_key_uses_only_in_memory_matchers(monkeypatch, tmp_path):
+    manifest = tmp_path / "ilac_dosya_manifest.json"
+    manifest.write_text(json.dumps({"PAROL": ["data/kub/parol.pdf"]}), encoding="utf-8")
+    drug_file = FileBackedValue(str(manifest), llm_api.load_drug_names)
+    monkeypatch.setattr(llm_api, "drug_matcher_file", drug_file)
+    monkeypatch.setattr(llm_api, "ingredient_matcher_file",
+                        FileBackedValue(str(tmp_path / "yok.json"), llm_api.load_ingredients))
+    llm_api.load_query_filters()
+
+    # Event loop yolunda dosyaya dokunulmaz
+    monkeypatch.setattr(llm_api.os, "stat", lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("os.stat")))
+    keys = []
+
+    class RecordingBatcher:
+        async def submit(self, key, request):
+            keys.append(key)
+            return []
+
+    monkeypatch.setattr(llm_api, "search_batcher", RecordingBatcher())
+    asyncio.run(llm_api.retrieve_results(llm_api.SearchRequest(query="Parol yan etkileri")))
+
+    assert json.loads(keys[0])["$and"][0] == {"drug_key": "parol"}
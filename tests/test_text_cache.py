@@ -0,0 +1,36 @@
+import json
+import pickle
+
+from text_cache import TextCache
+
+
+def read_index(cache):
+    with open(cache.index_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_index_keeps_one_entry_per_stored_blob(tmp_path):
+    cache = TextCache(str(tmp_path))
+    cache.put("aa11", "Parol 500 mg tablet", {"pages": 2})
+    cache.record("data/kub/parol.pdf", "aa11", {"pages": 2}, 19)
+    cache.record("data/kub/parol_kopya.pdf", "aa11", {"pages": 2}, 19)
+    cache.record("data/kub/blobsuz.pdf", "bb22", {"pages": 1}, 5)
+    cache.save_index()
+
+    assert [(entry["sha256"], entry["path"]) for entry in read_index(cache)] == [("aa11", "data/kub/parol_kopya.pdf")]
+
+    # Sonraki derleme mevcut dizini okur ve yerinde günceller
+    cache = TextCache(str(tmp_path))
+    cache.put("cc33", "Arveles 25 mg", {"pages": 1})
+    cache.record("data/kt/arveles.pdf", "cc33", {"pages": 1}, 13)
+    cache.record("data/kub/parol.pdf", "aa11", {"pages": 2}, 19)
+    cache.save_index()
+
+    assert sorted(entry["sha256"] for entry in read_index(cache)) == ["aa11", "cc33"]
+
+
+def test_pickled_cache_does_not_carry_index(tmp_path):
+    cache = TextCache(str(tmp_path))
+    cache.record("data/kub/parol.pdf", "aa11", {}, 0)
+
+    assert pickle.loads(pickle.dumps(cache))._index is None
@@ -0,0 +1,106 @@
+"""
+Çıkarılmış Metin Önbelleği
+PDF'lerden çıkarılan metni, PDF içeriğinin SHA-256 özetiyle anahtarlanmış
+sıkıştırılmış dosyalarda saklar. CHUNK_SIZE / CHUNK_OVERLAP denemelerinde
+PDF'ler yeniden ayrıştırılmaz, parçalama ve embedding doğrudan önbellekteki
+metinden çalışır.
+
+Disk düzeni:
+    <dizin>/v<EXTRACTOR_VERSION>/<özetin ilk 2 karakteri>/<özet>.json.gz
+    <dizin>/index.jsonl   -> blob'u olan her özet için bir kayıt (yol, sayfa/karakter sayısı)
+"""
+
+import os
+import gzip
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Metin çıkarma mantığı değiştiğinde artırılır; eski önbellek kendiliğinden geçersiz olur
+EXTRACTOR_VERSION = 1
+COMPRESS_LEVEL = 6
+
+
+class TextCache:
+    """İçerik özetine göre anahtarlanmış, PDF başına bir gzip dosyası tutan önbellek.
+
+    Süreçler arasında paylaşılabilir (yalnızca dizin yolunu taşır); her blob
+    geçici dosyaya yazılıp yer değiştirilerek atomik olarak oluşturulur. Dizin
+    ana süreçte özete göre bellekte güncellenir ve derleme başına bir kez
+    save_index ile yeniden yazılır.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, f"v{EXTRACTOR_VERSION}")
+        self.index_path = os.path.join(cache_dir, "index.jsonl")
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def __getstate__(self):
+        # İşçi süreçlere her iş gönderiminde dizin taşınmaz
+        state = self.__dict__.copy()
+        state["_index"] = None
+        return state
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.blob_dir, content_hash[:2], f"{content_hash}.json.gz")
+
+    def get(self, content_hash: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Önbellekteki (metin, çıkarma istatistikleri) ikilisini döndürür; yoksa None."""
+        path = self._blob_path(content_hash)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                blob = json.load(f)
+        except (OSError, EOFError, ValueError):
+            return None  # Bozuk blob: yeniden çıkarılıp üzerine yazılır
+        return blob["text"], blob["stats"]
+
+    def put(self, content_hash: str, text: str, stats: Dict[str, Any]):
+        path = self._blob_path(content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=COMPRESS_LEVEL) as f:
+            json.dump({"text": text, "stats": stats}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """index.jsonl'i özete göre okur (aynı özetin son kaydı geçerlidir)."""
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                            self._index[entry["sha256"]] = entry
+                        except (ValueError, KeyError, TypeError):
+                            continue  # Yarım kalmış satır
+        return self._index
+
+    def record(self, pdf_path: str, content_hash: str, stats: Dict[str, Any], chars: int):
+        """Yazılmış bir blob'un dizin kaydını ekler ya da günceller (yalnızca ana süreçten çağrılır)."""
+        self._load_index()[content_hash] = {
+            "path": pdf_path,
+            "sha256": content_hash,
+            "extractor_version": EXTRACTOR_VERSION,
+            "pages": stats.get("pages", 0),
+            "chars": chars,
+            "cached_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+
+    def save_index(self):
+        """Dizini atomik olarak yeniden yazar; blob'u olmayan (silinmiş, eski sürüm) kayıtlar atılır."""
+        index = self._load_index()
+        entries = [
+            entry for content_hash, entry in index.items()
+            if entry.get("extractor_version") == EXTRACTOR_VERSION and os.path.exists(self._blob_path(content_hash))
+        ]
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.index_path)
+        self._index = {entry["sha256"]: entry for entry in entries}